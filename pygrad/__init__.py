@@ -1 +1,15 @@
 from .engine import Value
+from .forward import Dual, jvp
+
+__all__ = ["Dual", "Tape", "TapeValue", "Value", "jit", "jvp", "trace"]
+
+# Names exported by the tape. Importing the tape loads Numba if it is installed, which takes far
+# longer than importing the rest of the package. The tape is therefore imported on first access.
+_TAPE_EXPORTS = ("Tape", "TapeValue", "jit", "trace")
+
+
+def __getattr__(name):
+    if name in _TAPE_EXPORTS:
+        from . import tape
+        return getattr(tape, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
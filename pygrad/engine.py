@@ -21,10 +21,206 @@ dynamically built directed acyclic graph (DAG).
 """
 from __future__ import annotations
 
-from math import tanh
+import logging
+from math import log, tanh
 from typing import Union
 
-DEBUG = False
+_log = logging.getLogger(__name__)
+
+# Operation codes.
+OP_LEAF = 0
+OP_ADD = 1
+OP_SUB = 2
+OP_MUL = 3
+OP_DIV = 4
+OP_POW = 5
+OP_NEG = 6
+OP_TANH = 7
+OP_RELU = 8
+OP_POW_VAL = 9
+OP_ADD_TANH = 10
+# Affine operation `arg * x + const` of a node and a constant operand.
+OP_CONST = 11
+
+
+def _pow(x: float, power: Union[float, int]) -> tuple:
+    """Computes power and its derivative.
+
+    Small integer exponents, including integral floats, are expanded into multiplications to avoid
+    calls of the general power function.
+
+    Args:
+        x: The base.
+        power: A float or an integer, the exponent.
+
+    Returns:
+        Tuple holding the power and its derivative.
+    """
+    if type(power) is float and power.is_integer():
+        power = int(power)
+    if type(power) is not int or not -8 <= power <= 8:
+        return x ** power, power * x ** (power - 1)
+    return _pow_int(x, power)
+
+
+def _pow_int(x: float, power: int) -> tuple:
+    """Computes power with a small integer exponent and its derivative by multiplications.
+
+    Uses only operations supported by Numba so that compiled kernels compute the same result as
+    `_pow`.
+
+    Args:
+        x: The base.
+        power: An integer between -8 and 8, the exponent.
+
+    Returns:
+        Tuple holding the power and its derivative.
+    """
+    n = -power if power < 0 else power
+    if n == 0:
+        data, grad = 1.0, 0.0
+    elif n == 1:
+        data, grad = x, 1.0
+    elif n == 2:
+        data, grad = x * x, 2.0 * x
+    elif n == 3:
+        xx = x * x
+        data, grad = xx * x, 3.0 * xx
+    elif n == 4:
+        xx = x * x
+        data, grad = xx * xx, 4.0 * xx * x
+    else:
+        # Build x^(n - 1) from x^4 with at most two further multiplications.
+        xx = x * x
+        xn = xx * xx
+        if n == 6:
+            xn = xn * x
+        elif n == 7:
+            xn = xn * xx
+        elif n == 8:
+            xn = xn * xx * x
+        data, grad = xn * x, n * xn
+    if power < 0:
+        # Derivative of reciprocal 1 / f is -f' / f^2.
+        inv = 1.0 / data
+        data, grad = inv, -grad * inv * inv
+    return data, grad
+
+
+def _local_grads(op: int, out: float, x: float, y: float, arg: float) -> tuple:
+    """Recomputes the gradients associated with the children of a node.
+
+    Local gradients are cheap functions of the data of a node and its children. Recomputing them
+    during the backward pass avoids storing them for every node. Only the power operation stores
+    its local gradient as argument since it is expensive to recompute. Operations with a constant
+    operand store their local gradient as argument since the constant is not recorded.
+
+    Args:
+        op: Operation code of node.
+        out: Data of node.
+        x: Data of first child.
+        y: Data of second child. Ignored for operations with a single child.
+        arg: Argument of operation.
+
+    Returns:
+        Tuple holding the gradients associated with the first and second child.
+    """
+    if op == OP_ADD:
+        return 1.0, 1.0
+    if op == OP_SUB:
+        return 1.0, -1.0
+    if op == OP_MUL:
+        return y, x
+    if op == OP_DIV:
+        # Reuse reciprocal to save a division.
+        inv = 1.0 / y
+        return inv, -x * inv * inv
+    if op == OP_POW or op == OP_CONST:
+        return arg, 0.0
+    if op == OP_NEG:
+        return -1.0, 0.0
+    if op == OP_TANH:
+        return 1.0 - out * out, 0.0
+    if op == OP_RELU:
+        return (1.0 if x > 0.0 else 0.0), 0.0
+    if op == OP_ADD_TANH:
+        grad = 1.0 - out * out
+        return grad, grad
+    if op == OP_POW_VAL:
+        # Derivative y * x^(y - 1) equals y * x^y / x for positive x.
+        return y * out / x, out * log(x)
+    return 0.0, 0.0
+
+
+def _grads_add(out: float, x: float, y: float, arg: float) -> tuple:
+    """Returns the local gradients of addition."""
+    return 1.0, 1.0
+
+
+def _grads_sub(out: float, x: float, y: float, arg: float) -> tuple:
+    """Returns the local gradients of subtraction."""
+    return 1.0, -1.0
+
+
+def _grads_mul(out: float, x: float, y: float, arg: float) -> tuple:
+    """Returns the local gradients of multiplication."""
+    return y, x
+
+
+def _grads_div(out: float, x: float, y: float, arg: float) -> tuple:
+    """Returns the local gradients of division, reusing the reciprocal of the divisor."""
+    inv = 1.0 / y
+    return inv, -x * inv * inv
+
+
+def _grads_arg(out: float, x: float, y: float, arg: float) -> tuple:
+    """Returns the local gradient stored as argument, e.g. of powers and affine operations."""
+    return arg, 0.0
+
+
+def _grads_neg(out: float, x: float, y: float, arg: float) -> tuple:
+    """Returns the local gradient of negation."""
+    return -1.0, 0.0
+
+
+def _grads_tanh(out: float, x: float, y: float, arg: float) -> tuple:
+    """Returns the local gradient of the hyperbolic tangent from its output."""
+    return 1.0 - out * out, 0.0
+
+
+def _grads_relu(out: float, x: float, y: float, arg: float) -> tuple:
+    """Returns the local gradient of ReLU."""
+    return (1.0 if x > 0.0 else 0.0), 0.0
+
+
+def _grads_pow_val(out: float, x: float, y: float, arg: float) -> tuple:
+    """Returns the local gradients of a power with a node as exponent."""
+    return y * out / x, out * log(x)
+
+
+def _grads_add_tanh(out: float, x: float, y: float, arg: float) -> tuple:
+    """Returns the local gradients of the hyperbolic tangent of a sum."""
+    grad = 1.0 - out * out
+    return grad, grad
+
+
+# Functions computing the local gradients indexed by operation code. They compute the same
+# gradients as `_local_grads` but replace its chain of comparisons with a single lookup. The chain
+# is kept for compiled kernels, which cannot call functions stored in a container.
+_LOCAL_GRADS = (
+    None,  # OP_LEAF
+    _grads_add,
+    _grads_sub,
+    _grads_mul,
+    _grads_div,
+    _grads_arg,  # OP_POW
+    _grads_neg,
+    _grads_tanh,
+    _grads_relu,
+    _grads_pow_val,
+    _grads_add_tanh,
+    _grads_arg,  # OP_CONST
+)
 
 
 class Value:
@@ -42,13 +238,19 @@ class Value:
         grad: A float holding the node's gradient.
         child_1: Pointer from parent to first child node.
         child_2: Pointer from parent to second child node.
-        grad_child_1: Gradient associated with first child.
-        grad_child_2: Gradient associated with second child.
+        requires_grad: A boolean indicating whether a gradient is computed for the node.
     """
-    _id = 0
+    __slots__ = (
+        "data", "grad", "child_1", "child_2", "requires_grad", "_op", "_arg", "_const", "_topo"
+    )
 
-    def __init__(self, data: float) -> None:
-        """Initializes Value with provided data and zero gradient."""
+    def __init__(self, data: float, requires_grad: bool = True) -> None:
+        """Initializes Value with provided data and zero gradient.
+
+        Args:
+            data: A float holding the node's value.
+            requires_grad: If false, no gradient is computed for the node, e.g. for fixed inputs.
+        """
 
         # Field for result of forward pass.
         self.data = data
@@ -61,69 +263,156 @@ class Value:
         self.child_1 = None
         self.child_2 = None
 
-        # Store gradients of children in parent node.
-        # These gradients depend on forward operation.
-        # Necessary for backward pass.
-        self.grad_child_1 = None
-        self.grad_child_2 = None
+        # Store operation from which node was created.
+        # Gradients of children are recomputed from operation during backward pass.
+        self._op = OP_LEAF
+        self._arg = None
+
+        # Constant operand of operation, i.e. the exponent of a power or the offset of an affine
+        # operation. Only needed to replay the forward pass, e.g. on a tape.
+        self._const = 0.0
+
+        # Leaf nodes are marked by the user. Parent nodes require a gradient if at least one of
+        # their children does. Subgraphs not requiring gradients are skipped in backward pass.
+        self.requires_grad = requires_grad
+
+        # Cached reverse topological order of intermediate nodes of graph rooted at this node.
+        # Built during first backward pass.
+        self._topo = None
+
+    @classmethod
+    def _binop(
+        cls,
+        data: float,
+        op: int,
+        child_1: Value,
+        child_2: Union[Value, None] = None,
+        arg: Union[float, None] = None,
+        const: float = 0.0,
+    ) -> Value:
+        """Creates a new parent node with all fields set at once.
+
+        Bypasses `__init__` so that operations do not overwrite freshly initialized fields.
+
+        Args:
+            data: Result of forward pass.
+            op: Operation code.
+            child_1: First child node.
+            child_2: Second child node or `None`.
+            arg: Argument of operation or `None`.
+            const: Constant operand of operation.
 
-        # Create object ID.
-        # Useful for debugging.
-        self._id = Value._id
-        Value._id += 1
+        Returns:
+            A new parent graph node.
+        """
+        out = cls.__new__(cls)
+        out.data = data
+        out.grad = 0.0
+        out.child_1 = child_1
+        out.child_2 = child_2
+        out._op = op
+        out._arg = arg
+        out._const = const
+        out.requires_grad = child_1.requires_grad or (
+            child_2 is not None and child_2.requires_grad
+        )
+        out._topo = None
+        return out
 
     def print(self) -> None:
         """Traverses computational graph and prints each node to console.
+
+        Nodes are printed in depth-first order using an explicit stack. Missing children are
+        printed as `None`.
         """
         print()
         print(self)
-        self._print_graph(self.child_1)
-        self._print_graph(self.child_2)
-
-    @staticmethod
-    def _print_graph(other: Value) -> None:
-        """Prints node to console.
-
-        Args:
-            other: Child node.
-        """
-        print(other)
-        if other is not None:
-            other._print_graph(other.child_1)
-            other._print_graph(other.child_2)
+        stack = [self.child_2, self.child_1]
+        while stack:
+            node = stack.pop()
+            print(node)
+            if node is not None:
+                stack.append(node.child_2)
+                stack.append(node.child_1)
 
     def backward(self) -> None:
         """Backward pass to compute gradients for each node of the computational graph.
+
+        Nodes are visited exactly once in reverse topological order. Gradients of leaf nodes are
+        accumulated across calls whereas gradients of intermediate nodes are reset before each pass.
+
+        Nodes that do not require a gradient are pruned from the graph.
+
+        The intermediate nodes in reverse topological order are cached on the root node during the
+        first call. Subsequent calls iterate the cached list without traversing the graph again.
+        The cache assumes that the graph is not modified between calls.
         """
+        if self._topo is None:
+            self._topo = [node for node in reversed(self._build_topo()) if node.child_1 is not None]
+        topo = self._topo
+
+        # Reset gradients of intermediate nodes from previous backward passes.
+        for node in topo:
+            node.grad = 0.0
+
         # Set root node's gradient of directed acyclic graph to 1.0.
         self.grad = 1.0
-        if DEBUG:
-            print("\n")
-            print(self)
-        self._traverse(self.child_1, self.grad_child_1)
-        self._traverse(self.child_2, self.grad_child_2)
 
-    def _traverse(self, other: Value, child_grad: float) -> None:
-        """Traverses directed acyclic graph and computes gradients for each node.
+        # Every intermediate node has at least one child.
+        for node in topo:
+            grad = node.grad
+            child_1 = node.child_1
+            child_2 = node.child_2
+            grad_child_1, grad_child_2 = _LOCAL_GRADS[node._op](
+                node.data, child_1.data, 0.0 if child_2 is None else child_2.data, node._arg
+            )
+            if child_1.requires_grad:
+                child_1.grad += grad * grad_child_1
+            if child_2 is not None and child_2.requires_grad:
+                child_2.grad += grad * grad_child_2
+
+        # Trace nodes only if requested to keep the backward pass free of I/O. The cached list holds
+        # no leaves, so the graph is traversed again to trace their gradients as well.
+        if _log.isEnabledFor(logging.DEBUG):
+            for node in reversed(self._build_topo()):
+                _log.debug(node)
+
+    def zero_grad_tree(self) -> None:
+        """Resets the gradients of all nodes of the graph rooted at this node to zero.
+
+        Gradients of leaf nodes accumulate across backward passes. Resetting them allows reusing
+        the leaves, e.g. the parameters of a model, for the next iteration of an optimization loop.
+        """
+        for node in self._build_topo():
+            node.grad = 0.0
 
-        During the traverse of the computational graph all gradients from operations in which the
-        child node was involved are summed up.
+    def _build_topo(self) -> list:
+        """Builds topological order of the nodes of the graph rooted at this node.
 
-        Args:
-            other: Child node.
-            child_grad: Gradient associated with child.
+        Only nodes that require a gradient are included. The graph is traversed with an iterative
+        depth-first search. The stack holds the nodes of the current path together with an iterator
+        over their remaining children, so that every node is pushed exactly once. Nodes are
+        appended in post-order so that every child precedes its parents.
 
+        Returns:
+            List of nodes in topological order ending with this node.
         """
-        if other is not None:
-            other.grad += self.grad * child_grad
-            if DEBUG:
-                print(other)
-            other._traverse(other.child_1, other.grad_child_1)
-            other._traverse(other.child_2, other.grad_child_2)
-            if (other.child_1 is not None) or (other.child_2 is not None):
-                other.grad = 0.0
-
-    def __add__(self, other: Value) -> Value:
+        topo = []
+        visited = {self}
+        stack = [(self, iter((self.child_1, self.child_2)))]
+        while stack:
+            node, children = stack[-1]
+            for child in children:
+                if child is not None and child.requires_grad and child not in visited:
+                    visited.add(child)
+                    stack.append((child, iter((child.child_1, child.child_2))))
+                    break
+            else:
+                stack.pop()
+                topo.append(node)
+        return topo
+
+    def __add__(self, other: Union[Value, float]) -> Value:
         r"""Implements addition of nodes in a directed acyclic graph.
 
         .. math::
@@ -132,28 +421,24 @@ class Value:
             \frac{df(x, y)}{dy} = 1
 
         This operation adds two scalar values (forward pass), creates a parent node to store
-        the result, adds the gradients associated with the operation to the newly created parent
-        node, and adds two pointers from the parent node to its children.
+        the result and the operation, and adds two pointers from the parent node to its children.
+        The gradients associated with the operation are recomputed during the backward pass.
 
         Args:
-            other: Graph node.
+            other: Graph node or constant.
 
         Returns:
             A new parent graph node.
         """
-        # Forward pass.
-        data = self.data + other.data
-        # Create new parent node in directed acyclic graph.
-        out = Value(data=data)
-        # Add gradients for both children to parent node for addition operation.
-        out.grad_child_1 = 1.0
-        out.grad_child_2 = 1.0 
-        # Add both children to parent node for tree traverse.
-        out.child_1 = self
-        out.child_2 = other
-        return out
-
-    def __sub__(self, other: Value) -> Value:
+        if isinstance(other, Value):
+            # Create new parent node holding result of forward pass and both children.
+            return Value._binop(self.data + other.data, OP_ADD, self, other)
+        if other == 0:
+            return self
+        # Constant operands are not recorded as nodes and receive no gradient.
+        return Value._binop(self.data + other, OP_CONST, self, arg=1.0, const=other)
+
+    def __sub__(self, other: Union[Value, float]) -> Value:
         r"""Implements subtraction of nodes in a directed acyclic graph.
 
         .. math::
@@ -162,28 +447,24 @@ class Value:
             \frac{df(x, y)}{dy} = -1
 
         This operation subtracts two scalar values (forward pass), creates a parent node to store
-        the result, adds the gradients associated with the operation to the newly created parent
-        node, and adds two pointers from the parent node to its children.
+        the result and the operation, and adds two pointers from the parent node to its children.
+        The gradients associated with the operation are recomputed during the backward pass.
 
         Args:
-            other: Graph node.
+            other: Graph node or constant.
 
         Returns:
             A new parent graph node.
         """
-        # Forward pass.
-        data = self.data - other.data
-        # Create new parent node in directed acyclic graph.
-        out = Value(data=data)
-        # Add gradients for both children to parent node for subtraction operation.
-        out.grad_child_1 = 1.0
-        out.grad_child_2 = -1.0
-        # Add both children to parent node for tree traverse.
-        out.child_1 = self
-        out.child_2 = other
-        return out
-
-    def __mul__(self, other: Value) -> Value:
+        if isinstance(other, Value):
+            # Create new parent node holding result of forward pass and both children.
+            return Value._binop(self.data - other.data, OP_SUB, self, other)
+        if other == 0:
+            return self
+        # Constant operands are not recorded as nodes and receive no gradient.
+        return Value._binop(self.data - other, OP_CONST, self, arg=1.0, const=-other)
+
+    def __mul__(self, other: Union[Value, float]) -> Value:
         r"""Implements multiplication of nodes in a directed acyclic graph.
 
         .. math::
@@ -192,28 +473,24 @@ class Value:
             \frac{df(x, y)}{dy} = x
 
         This operation multiplies two scalar values (forward pass), creates a parent node to store
-        the result, adds the gradients associated with the operation to the newly created parent
-        node, and adds two pointers from the parent node to its children.
+        the result and the operation, and adds two pointers from the parent node to its children.
+        The gradients associated with the operation are recomputed during the backward pass.
 
         Args:
-            other: Graph node.
+            other: Graph node or constant.
 
         Returns:
             A new parent graph node.
         """
-        # Forward pass.
-        data = self.data * other.data
-        # Create new parent node in directed acyclic graph.
-        out = Value(data=data)
-        # Add gradients for both children to parent node for multiplication operation.
-        out.grad_child_1 = other.data
-        out.grad_child_2 = self.data
-        # Add both children to parent node for tree traverse.
-        out.child_1 = self
-        out.child_2 = other
-        return out 
-
-    def __truediv__(self, other: Value) -> Value:
+        if isinstance(other, Value):
+            # Create new parent node holding result of forward pass and both children.
+            return Value._binop(self.data * other.data, OP_MUL, self, other)
+        if other == 1:
+            return self
+        # Constant operands are not recorded as nodes and receive no gradient.
+        return Value._binop(self.data * other, OP_CONST, self, arg=float(other))
+
+    def __truediv__(self, other: Union[Value, float]) -> Value:
         r"""Implements division of nodes in a directed acyclic graph.
 
         .. math::
@@ -222,26 +499,79 @@ class Value:
             \frac{df(x, y)}{dy} = - x / y^2
 
         This operation divides two scalar values (forward pass), creates a parent node to store
-        the result, adds the gradients associated with the operation to the newly created parent
-        node, and adds two pointers from the parent node to its children.
+        the result and the operation, and adds two pointers from the parent node to its children.
+        The gradients associated with the operation are recomputed during the backward pass.
 
         Args:
-            other: Graph node.
+            other: Graph node or constant.
 
         Returns:
             A new parent graph node.
         """
-        # Forward pass.
-        data = self.data / other.data
-        # Create new parent node in directed acyclic graph.
-        out = Value(data=data)
-        # Add gradients for both children to parent node for division operation.
-        out.grad_child_1 = 1.0 / other.data
-        out.grad_child_2 = -self.data / (other.data * other.data)
-        # Add both children to parent node for tree traverse.
-        out.child_1 = self
-        out.child_2 = other
-        return out
+        if isinstance(other, Value):
+            # Create new parent node holding result of forward pass and both children.
+            return Value._binop(self.data / other.data, OP_DIV, self, other)
+        if other == 1:
+            return self
+        # Constant operands are not recorded as nodes and receive no gradient.
+        return Value._binop(self.data / other, OP_CONST, self, arg=1.0 / other)
+
+    def __radd__(self, other: float) -> Value:
+        r"""Implements addition of a constant and a node.
+
+        Args:
+            other: Constant.
+
+        Returns:
+            A new parent graph node.
+        """
+        if other == 0:
+            return self
+        return Value._binop(other + self.data, OP_CONST, self, arg=1.0, const=other)
+
+    def __rsub__(self, other: float) -> Value:
+        r"""Implements subtraction of a node from a constant.
+
+        .. math::
+            f(x; c) = c - x \\
+            \frac{df(x)}{dx} = -1
+
+        Args:
+            other: Constant.
+
+        Returns:
+            A new parent graph node.
+        """
+        return Value._binop(other - self.data, OP_CONST, self, arg=-1.0, const=other)
+
+    def __rmul__(self, other: float) -> Value:
+        r"""Implements multiplication of a constant and a node.
+
+        Args:
+            other: Constant.
+
+        Returns:
+            A new parent graph node.
+        """
+        if other == 1:
+            return self
+        return Value._binop(other * self.data, OP_CONST, self, arg=float(other))
+
+    def __rtruediv__(self, other: float) -> Value:
+        r"""Implements division of a constant by a node.
+
+        .. math::
+            f(x; c) = c / x \\
+            \frac{df(x)}{dx} = - c / x^2
+
+        Args:
+            other: Constant.
+
+        Returns:
+            A new parent graph node.
+        """
+        # Compose reciprocal and scaling, since the quotient is not affine in the node.
+        return self ** -1 * other
 
     def __pow__(self, power: Union[float, int]) -> Value:
         r"""Implements power of a node in a directed acyclic graph.
@@ -261,14 +591,36 @@ class Value:
             A new parent graph node.
         """
         # Forward pass.
-        data = self.data ** power
-        # Create new parent node in directed acyclic graph.
-        out = Value(data=data)
-        # Add gradient of child to parent node for power operation.
-        out.grad_child_1 = power * self.data ** (power - 1)
-        # Add child to parent node for tree traverse.
-        out.child_1 = self
-        return out
+        data, grad = _pow(self.data, power)
+        # Create new parent node holding result of forward pass, the child, and the gradient of
+        # the child which is expensive to recompute.
+        return Value._binop(data, OP_POW, self, arg=grad, const=power)
+
+    def pow_val(self, other: Value) -> Value:
+        r"""Implements power of a node with a node as exponent in a directed acyclic graph.
+
+        .. math::
+            f(x, y) = x^y \\
+            \frac{df(x, y)}{dx} = y * x^(y-1) \\
+            \frac{df(x, y)}{dy} = x^y * log(x)
+
+        Unlike `__pow__`, which only accepts constant exponents, this operation also computes the
+        gradient with respect to the exponent. It is therefore only defined for positive bases.
+
+        Args:
+            other: Graph node, the exponent.
+
+        Returns:
+            A new parent graph node.
+
+        Raises:
+            ValueError: If the base is not positive.
+        """
+        x = self.data
+        if x <= 0.0:
+            raise ValueError(f"Base must be positive, got {x}.")
+        # Create new parent node holding result of forward pass and both children.
+        return Value._binop(x ** other.data, OP_POW_VAL, self, other)
 
     def __neg__(self) -> Value:
         r"""Implements power of a node in a directed acyclic graph.
@@ -278,21 +630,14 @@ class Value:
             \frac{df(x)}{dx} = -1
 
         This operation returns the negation of a node (forward pass), creates a parent node to store
-        the result, adds the gradient associated with the operation to the newly created parent
-        node, and adds a pointer from the parent node to its child.
+        the result and the operation, and adds a pointer from the parent node to its child. The
+        gradient associated with the operation is recomputed during the backward pass.
 
         Returns:
             A new parent graph node.
         """
-        # Forward pass.
-        data = -self.data
-        # Create new parent node in directed acyclic graph.
-        out = Value(data=data)
-        # Add gradient of child to parent node for negation operation.
-        out.grad_child_1 = -1.0
-        # Add child to parent node for tree traverse.
-        out.child_1 = self
-        return out
+        # Create new parent node holding result of forward pass and the child.
+        return Value._binop(-self.data, OP_NEG, self)
 
     def tanh(self) -> Value:
         r"""Implements hyperbolic tangent of a node in a directed acyclic graph.
@@ -302,21 +647,19 @@ class Value:
             \frac{df(x)}{dx} = 1 - tanh(x)^2
 
         This operation returns the hyperbolic tangent of a node (forward pass), creates a parent
-        node to store the result, adds the gradient associated with the operation to the newly
-        created parent node, and adds a pointer from the parent node to its child.
+        node to store the result and the operation, and adds a pointer from the parent node to its
+        child. The gradient associated with the operation is recomputed during the backward pass.
 
         Returns:
             A new parent graph node.
         """
-        # Forward pass.
-        data = tanh(self.data)
-        # Create new parent node in directed acyclic graph.
-        out = Value(data=data)
-        # Add gradient of child to parent node for negation tanh() operation.
-        out.grad_child_1 = 1.0 - data**2
-        # Add child to parent node for tree traverse.
-        out.child_1 = self
-        return out
+        if self._op == OP_ADD:
+            # Fuse with the preceding addition. The new node points directly to the children of
+            # the addition, which saves one node during the backward pass. The addition remains
+            # valid for other parents but does not receive the gradient from this node.
+            return Value._binop(tanh(self.data), OP_ADD_TANH, self.child_1, self.child_2)
+        # Create new parent node holding result of forward pass and the child.
+        return Value._binop(tanh(self.data), OP_TANH, self)
 
     def relu(self) -> Value:
         r"""Implements ReLU of a node in a directed acyclic graph.
@@ -336,21 +679,15 @@ class Value:
 
 
         This operation returns the ReLU of a node (forward pass), creates a parent node to store the
-        result, adds the gradient associated with the operation to the newly created parent node,
-        and adds a pointer from the parent node to its child.
+        result and the operation, and adds a pointer from the parent node to its child. The
+        gradient associated with the operation is recomputed during the backward pass.
 
         Returns:
             A new parent graph node.
         """
-        # Forward pass.
-        data = self.data * (self.data > 0)
-        # Create new parent node in directed acyclic graph.
-        out = Value(data=data)
-        # Add gradient of child associated with operation to parent node.
-        out.grad_child_1 = 1.0 * (self.data > 0)
-        # Add child to parent node for tree traverse.
-        out.child_1 = self
-        return out
+        x = self.data
+        # Create new parent node holding result of forward pass and the child.
+        return Value._binop(x if x > 0.0 else 0.0, OP_RELU, self)
 
     def __repr__(self) -> str:
-        return f"id = {self._id}\t data = {self.data:.3f}\t grad = {self.grad:.3f}"
+        return f"id = {id(self)}\t data = {self.data:.3f}\t grad = {self.grad:.3f}"
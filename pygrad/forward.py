@@ -0,0 +1,205 @@
+r"""A scalar-valued forward-mode automatic differentiation engine.
+
+This module implements the operations of :mod:`pygrad.engine` for dual numbers. A dual number
+carries the value of a node together with its tangent, i.e. the derivative of the value with
+respect to the input. Each operation computes both at once, so that no graph is built and no
+backward pass is required. For functions with a single input this yields the derivative at the
+cost of a single forward pass.
+
+    Typical usage example:
+
+    .. code:: python
+
+        from pygrad.forward import jvp
+
+        out, grad = jvp(lambda x: (x * x + x).tanh(), 0.5)
+"""
+from __future__ import annotations
+
+from math import tanh
+from typing import Callable, Union
+
+from .engine import _pow
+
+
+class Dual:
+    r"""This class represents a dual number holding a value and its tangent.
+
+    Operands of operations are either dual numbers or constants. Constants have a tangent of zero.
+
+    Attributes:
+        data: A float holding the value.
+        tangent: A float holding the derivative of the value with respect to the input.
+    """
+    __slots__ = ("data", "tangent")
+
+    def __init__(self, data: float, tangent: float = 0.0) -> None:
+        """Initializes Dual with provided value and tangent.
+
+        Args:
+            data: Value of dual number.
+            tangent: Tangent of dual number. Set to one for the input of differentiation.
+        """
+        self.data = data
+        self.tangent = tangent
+
+    def __add__(self, other: Union[Dual, float]) -> Dual:
+        r"""Implements addition of dual numbers.
+
+        .. math::
+            (x, \dot{x}) + (y, \dot{y}) = (x + y, \dot{x} + \dot{y})
+
+        Args:
+            other: Dual number or constant.
+
+        Returns:
+            A new dual number.
+        """
+        if isinstance(other, Dual):
+            return Dual(self.data + other.data, self.tangent + other.tangent)
+        return Dual(self.data + other, self.tangent)
+
+    __radd__ = __add__
+
+    def __sub__(self, other: Union[Dual, float]) -> Dual:
+        r"""Implements subtraction of dual numbers.
+
+        .. math::
+            (x, \dot{x}) - (y, \dot{y}) = (x - y, \dot{x} - \dot{y})
+
+        Args:
+            other: Dual number or constant.
+
+        Returns:
+            A new dual number.
+        """
+        if isinstance(other, Dual):
+            return Dual(self.data - other.data, self.tangent - other.tangent)
+        return Dual(self.data - other, self.tangent)
+
+    def __rsub__(self, other: float) -> Dual:
+        r"""Implements subtraction of a dual number from a constant.
+
+        Args:
+            other: Constant.
+
+        Returns:
+            A new dual number.
+        """
+        return Dual(other - self.data, -self.tangent)
+
+    def __mul__(self, other: Union[Dual, float]) -> Dual:
+        r"""Implements multiplication of dual numbers.
+
+        .. math::
+            (x, \dot{x}) * (y, \dot{y}) = (x * y, \dot{x} * y + x * \dot{y})
+
+        Args:
+            other: Dual number or constant.
+
+        Returns:
+            A new dual number.
+        """
+        if isinstance(other, Dual):
+            return Dual(
+                self.data * other.data, self.tangent * other.data + self.data * other.tangent
+            )
+        return Dual(self.data * other, self.tangent * other)
+
+    __rmul__ = __mul__
+
+    def __truediv__(self, other: Union[Dual, float]) -> Dual:
+        r"""Implements division of dual numbers.
+
+        .. math::
+            (x, \dot{x}) / (y, \dot{y}) = (x / y, (\dot{x} - x / y * \dot{y}) / y)
+
+        Args:
+            other: Dual number or constant.
+
+        Returns:
+            A new dual number.
+        """
+        if isinstance(other, Dual):
+            inv = 1.0 / other.data
+            data = self.data * inv
+            return Dual(data, (self.tangent - data * other.tangent) * inv)
+        inv = 1.0 / other
+        return Dual(self.data * inv, self.tangent * inv)
+
+    def __rtruediv__(self, other: float) -> Dual:
+        r"""Implements division of a constant by a dual number.
+
+        Args:
+            other: Constant.
+
+        Returns:
+            A new dual number.
+        """
+        data = other / self.data
+        return Dual(data, -data / self.data * self.tangent)
+
+    def __pow__(self, power: Union[float, int]) -> Dual:
+        r"""Implements power of a dual number with a constant exponent.
+
+        .. math::
+            (x, \dot{x})^n = (x^n, n * x^{n-1} * \dot{x})
+
+        Args:
+            power: A float or an integer, the exponent.
+
+        Returns:
+            A new dual number.
+        """
+        data, grad = _pow(self.data, power)
+        return Dual(data, grad * self.tangent)
+
+    def __neg__(self) -> Dual:
+        r"""Implements negation of a dual number.
+
+        Returns:
+            A new dual number.
+        """
+        return Dual(-self.data, -self.tangent)
+
+    def tanh(self) -> Dual:
+        r"""Implements hyperbolic tangent of a dual number.
+
+        .. math::
+            tanh((x, \dot{x})) = (tanh(x), (1 - tanh(x)^2) * \dot{x})
+
+        Returns:
+            A new dual number.
+        """
+        t = tanh(self.data)
+        return Dual(t, (1.0 - t * t) * self.tangent)
+
+    def relu(self) -> Dual:
+        r"""Implements ReLU of a dual number.
+
+        Returns:
+            A new dual number.
+        """
+        if self.data > 0.0:
+            return Dual(self.data, self.tangent)
+        return Dual(0.0, 0.0)
+
+    def __repr__(self) -> str:
+        return f"data = {self.data}\t tangent = {self.tangent}"
+
+
+def jvp(fn: Callable, x: float, tangent: float = 1.0) -> tuple:
+    """Computes the value of a function of a single input and its derivative in forward mode.
+
+    Args:
+        fn: Function applying operations to its argument.
+        x: Float at which the function is evaluated.
+        tangent: Tangent of the input by which the derivative is scaled.
+
+    Returns:
+        Tuple holding the function's value and the derivative times the tangent.
+    """
+    out = fn(Dual(x, tangent))
+    if not isinstance(out, Dual):
+        return out, 0.0
+    return out.data, out.tangent
@@ -0,0 +1,938 @@
+r"""A tape-based scalar-valued automatic differentiation engine.
+
+This module implements the operations of :mod:`pygrad.engine`, including constant operands, but
+records the computational graph on a tape. Powers with a node as exponent are not supported. The tape stores the graph in contiguous arrays holding the data, gradients, and
+operation arguments of all nodes, and a packed record per node holding its children and operation.
+Every node is a slot of the tape and a `TapeValue` is a thin handle holding the index of its slot.
+
+Children are always recorded before their parents. The order of the tape is therefore a valid
+topological order and the backward pass is a single reverse sweep over the arrays. If Numba is
+installed, the sweep is compiled to machine code. Graphs built with :class:`pygrad.engine.Value`
+can be recorded on a tape with :meth:`Tape.record` to run their backward pass on the tape.
+
+For large graphs, the backward pass can alternatively process the nodes in waves. A wave holds all
+nodes with the same longest distance from the leaves. The parents of a node always belong to a later
+wave. Thus, all nodes of a wave can gather their gradients from their parents independently of each
+other and, if Numba is installed, in parallel.
+
+    Typical usage example:
+
+    .. code:: python
+
+        from pygrad.tape import TapeValue
+
+        a = TapeValue(data=2.0)
+        b = TapeValue(data=3.0)
+        c = TapeValue(data=4.0)
+
+        out = a + b
+        out = out * c
+        out = -out.tanh()
+
+        out.backward()
+"""
+from __future__ import annotations
+
+from array import array
+from functools import lru_cache
+from math import log, tanh
+from typing import Callable, Union
+
+from .engine import (
+    OP_ADD, OP_ADD_TANH, OP_CONST, OP_DIV, OP_LEAF, OP_MUL, OP_NEG, OP_POW, OP_POW_VAL, OP_RELU,
+    OP_SUB, OP_TANH, Value, _local_grads, _pow, _pow_int
+)
+
+try:
+    from numba import njit, prange
+except ImportError:  # Numba is optional.
+    njit = None
+    prange = range
+
+# Index of missing child.
+NO_CHILD = -1
+
+# Layout of node records. The integer fields of a node are accessed together during the backward
+# pass and are therefore stored contiguously in a single record.
+NODE_CHILD_1 = 0
+NODE_CHILD_2 = 1
+NODE_OP = 2
+NODE_REQUIRES_GRAD = 3
+NODE_SIZE = 4
+
+
+def _backward_kernel(n, grad, data, arg, nodes):
+    """Accumulates gradients of the first `n` nodes of a tape in reverse order.
+
+    Expects the gradient of node `n - 1` to be set and all other gradients to be zero. Nodes that
+    do not require a gradient are skipped. So are nodes without upstream gradient, e.g. nodes
+    recorded before the root that are not part of its graph. Their contribution is zero, except
+    that multiplying zero by an infinite local gradient would propagate NaN to their children.
+    Local gradients are recomputed from the operation codes. Operates on raw arrays only so that it
+    can be compiled with Numba.
+    """
+    for k in range(n - 1, -1, -1):
+        r = NODE_SIZE * k
+        op = nodes[r + NODE_OP]
+        if not nodes[r + NODE_REQUIRES_GRAD] or op == OP_LEAF:
+            continue
+        g = grad[k]
+        if g == 0.0:
+            continue
+        idx_1 = nodes[r + NODE_CHILD_1]
+        idx_2 = nodes[r + NODE_CHILD_2]
+        grad_child_1, grad_child_2 = _local_grads(
+            op, data[k], data[idx_1], data[idx_2] if idx_2 >= 0 else 0.0, arg[k]
+        )
+        if nodes[NODE_SIZE * idx_1 + NODE_REQUIRES_GRAD]:
+            grad[idx_1] += g * grad_child_1
+        if idx_2 >= 0 and nodes[NODE_SIZE * idx_2 + NODE_REQUIRES_GRAD]:
+            grad[idx_2] += g * grad_child_2
+
+
+def _forward_kernel(n, data, arg, const, nodes):
+    """Recomputes the data of the first `n` nodes of a tape from the data of the leaves.
+
+    Arguments of power operations are recomputed from their exponents. Small integral exponents are
+    expanded into multiplications as in :func:`pygrad.engine._pow`, so that replayed powers agree
+    with the engine, e.g. for a zero exponent at a zero base. Operates on raw arrays only so that
+    it can be compiled with Numba.
+    """
+    for k in range(n):
+        r = NODE_SIZE * k
+        op = nodes[r + NODE_OP]
+        if op == OP_LEAF:
+            continue
+        x = data[nodes[r + NODE_CHILD_1]]
+        idx_2 = nodes[r + NODE_CHILD_2]
+        y = data[idx_2] if idx_2 >= 0 else 0.0
+        if op == OP_ADD:
+            data[k] = x + y
+        elif op == OP_SUB:
+            data[k] = x - y
+        elif op == OP_MUL:
+            data[k] = x * y
+        elif op == OP_DIV:
+            data[k] = x / y
+        elif op == OP_POW:
+            p = const[k]
+            if -8.0 <= p <= 8.0 and int(p) == p:
+                data[k], arg[k] = _pow_int(x, int(p))
+            else:
+                data[k] = x ** p
+                arg[k] = p * x ** (p - 1.0)
+        elif op == OP_NEG:
+            data[k] = -x
+        elif op == OP_TANH:
+            data[k] = tanh(x)
+        elif op == OP_RELU:
+            data[k] = x if x > 0.0 else 0.0
+        elif op == OP_ADD_TANH:
+            data[k] = tanh(x + y)
+        elif op == OP_POW_VAL:
+            data[k] = x ** y
+        elif op == OP_CONST:
+            data[k] = arg[k] * x + const[k]
+
+
+def _levels_kernel(n, nodes, level):
+    """Computes the longest distance from the leaves for each of the first `n` nodes of a tape.
+
+    Returns:
+        The maximum distance.
+    """
+    max_level = 0
+    for k in range(n):
+        r = NODE_SIZE * k
+        lvl = 0
+        idx = nodes[r + NODE_CHILD_1]
+        if idx >= 0:
+            lvl = level[idx] + 1
+        idx = nodes[r + NODE_CHILD_2]
+        if idx >= 0 and level[idx] >= lvl:
+            lvl = level[idx] + 1
+        level[k] = lvl
+        if lvl > max_level:
+            max_level = lvl
+    return max_level
+
+
+def _schedule_kernel(n, nodes, level, wave_ptr, order, parent_ptr, parent_edge):
+    """Groups the first `n` nodes of a tape into waves and collects the parents of each node.
+
+    Expects zero-initialized buffers. Afterwards, `order[wave_ptr[w]:wave_ptr[w + 1]]` holds the
+    nodes of wave `w`. The edges to the parents of node `k` are stored in
+    `parent_edge[parent_ptr[k]:parent_ptr[k + 1]]`. An edge from child slot `s` of parent `p` is
+    encoded as `2 * p + s`, so that a node appearing as both children of a parent gets two edges.
+    The schedule depends only on the structure of the graph, not on its data.
+    """
+    # Counting sort of nodes by wave.
+    num_waves = len(wave_ptr) - 2
+    for k in range(n):
+        wave_ptr[level[k] + 2] += 1
+    for w in range(num_waves):
+        wave_ptr[w + 2] += wave_ptr[w + 1]
+    for k in range(n):
+        p = wave_ptr[level[k] + 1]
+        order[p] = k
+        wave_ptr[level[k] + 1] = p + 1
+
+    # Reverse edges from children to parents.
+    for k in range(n):
+        r = NODE_SIZE * k
+        idx = nodes[r + NODE_CHILD_1]
+        if idx >= 0:
+            parent_ptr[idx + 2] += 1
+        idx = nodes[r + NODE_CHILD_2]
+        if idx >= 0:
+            parent_ptr[idx + 2] += 1
+    for k in range(n):
+        parent_ptr[k + 2] += parent_ptr[k + 1]
+    for k in range(n):
+        r = NODE_SIZE * k
+        idx_1 = nodes[r + NODE_CHILD_1]
+        if idx_1 < 0:
+            continue
+        e = parent_ptr[idx_1 + 1]
+        parent_edge[e] = 2 * k
+        parent_ptr[idx_1 + 1] = e + 1
+        idx_2 = nodes[r + NODE_CHILD_2]
+        if idx_2 >= 0:
+            e = parent_ptr[idx_2 + 1]
+            parent_edge[e] = 2 * k + 1
+            parent_ptr[idx_2 + 1] = e + 1
+
+
+def _backward_waves_kernel(
+    num_waves, grad, data, arg, nodes, wave_ptr, order, parent_ptr, parent_edge
+):
+    """Accumulates gradients wave by wave, starting with the last wave.
+
+    Every node only writes its own gradient. Nodes of the same wave are therefore processed in
+    parallel if compiled with Numba. Local gradients of the edges are recomputed from the current
+    data. Nodes that do not require a gradient and edges from parents without upstream gradient are
+    skipped, as in `_backward_kernel`.
+    """
+    for w in range(num_waves - 1, -1, -1):
+        for p in prange(wave_ptr[w], wave_ptr[w + 1]):
+            k = order[p]
+            if not nodes[NODE_SIZE * k + NODE_REQUIRES_GRAD]:
+                continue
+            g = 0.0
+            for e in range(parent_ptr[k], parent_ptr[k + 1]):
+                parent = parent_edge[e] >> 1
+                g_parent = grad[parent]
+                if g_parent == 0.0:
+                    continue
+                r = NODE_SIZE * parent
+                idx_2 = nodes[r + NODE_CHILD_2]
+                grad_child_1, grad_child_2 = _local_grads(
+                    nodes[r + NODE_OP], data[parent], data[nodes[r + NODE_CHILD_1]],
+                    data[idx_2] if idx_2 >= 0 else 0.0, arg[parent]
+                )
+                if parent_edge[e] & 1:
+                    g += g_parent * grad_child_2
+                else:
+                    g += g_parent * grad_child_1
+            grad[k] += g
+
+
+# Fast-math flags for compiled kernels. Contracting allows fusing the multiply-add accumulation
+# `grad += g * grad_child` into a single FMA instruction with a single rounding. Other flags are
+# omitted since they assume the absence of NaNs and infinities, which may occur in gradients.
+_FASTMATH = {"contract"}
+
+if njit is not None:
+    _local_grads = njit(cache=True, fastmath=_FASTMATH)(_local_grads)
+    _pow_int = njit(cache=True)(_pow_int)
+    _backward_kernel = njit(cache=True, fastmath=_FASTMATH)(_backward_kernel)
+    _forward_kernel = njit(cache=True)(_forward_kernel)
+    _levels_kernel = njit(cache=True)(_levels_kernel)
+    _schedule_kernel = njit(cache=True)(_schedule_kernel)
+    _backward_waves_jit = njit(cache=True, fastmath=_FASTMATH, parallel=True)(
+        _backward_waves_kernel
+    )
+
+    def _backward_waves_kernel(num_waves, *buffers):
+        """Calls the compiled wave-based kernel on NumPy views of the buffers.
+
+        Parallel kernels only accept NumPy arrays, which are always available alongside Numba. The
+        views share memory with the buffers and are released after the call so that the buffers
+        remain resizable.
+        """
+        from numpy import frombuffer
+
+        _backward_waves_jit(num_waves, *[frombuffer(buf, dtype=buf.typecode) for buf in buffers])
+
+
+# Source code of the gradient accumulation for both children of a node. The placeholders `k`, `i`,
+# and `j` are replaced by the indices of the node and its first and second child. The gradient of
+# the node is bound to `g`. Statements listed as prelude are emitted before the accumulation.
+_BACKWARD_SOURCE = {
+    OP_ADD: (None, "grad[{i}] += g", "grad[{j}] += g"),
+    OP_SUB: (None, "grad[{i}] += g", "grad[{j}] -= g"),
+    OP_MUL: (None, "grad[{i}] += g * data[{j}]", "grad[{j}] += g * data[{i}]"),
+    OP_DIV: (
+        "inv = 1.0 / data[{j}]", "grad[{i}] += g * inv", "grad[{j}] -= g * data[{i}] * inv * inv"
+    ),
+    OP_POW: (None, "grad[{i}] += g * arg[{k}]", None),
+    OP_CONST: (None, "grad[{i}] += g * arg[{k}]", None),
+    OP_NEG: (None, "grad[{i}] -= g", None),
+    OP_TANH: (None, "grad[{i}] += g * (1.0 - data[{k}] * data[{k}])", None),
+    OP_RELU: (None, "if data[{i}] > 0.0: grad[{i}] += g", None),
+    OP_ADD_TANH: ("t = g * (1.0 - data[{k}] * data[{k}])", "grad[{i}] += t", "grad[{j}] += t"),
+    OP_POW_VAL: (
+        None,
+        "grad[{i}] += g * data[{j}] * data[{k}] / data[{i}]",
+        "grad[{j}] += g * data[{k}] * log(data[{i}])",
+    ),
+}
+
+
+# Maximum number of nodes for which generated backward passes are compiled with Numba. Compile time
+# grows much faster than the number of statements, e.g. to several seconds for a hundred nodes.
+# Larger graphs use the generic kernel, which is compiled once for all graphs.
+COMPILE_MAX_NODES = 64
+
+
+@lru_cache(maxsize=128)
+def _compile_backward(nodes: bytes) -> Callable:
+    """Generates a backward pass specialized to a graph.
+
+    The generated function consists of one block of statements per node in reverse order with all
+    indices and gradient expressions inlined. It is compiled with Numba if available and the graph
+    has at most `COMPILE_MAX_NODES` nodes. Larger graphs are processed by the generic compiled
+    kernel instead. Results are cached for graphs with identical records.
+
+    Args:
+        nodes: Records of the nodes of the graph. The last node is the root.
+
+    Returns:
+        Function taking the tape's gradient, data, and argument arrays.
+    """
+    nodes = array("q", nodes)
+    n = len(nodes) // NODE_SIZE
+    if njit is not None and n > COMPILE_MAX_NODES:
+
+        def backward(grad, data, arg):
+            grad[:n] = array(grad.typecode, bytes(grad.itemsize * n))
+            grad[n - 1] = 1.0
+            _backward_kernel(n, grad, data, arg, nodes)
+
+        return backward
+
+    lines = [
+        "def _backward(grad, data, arg):",
+        f"    for k in range({n}):",
+        "        grad[k] = 0.0",
+        f"    grad[{n - 1}] = 1.0",
+    ]
+    for k in range(n - 1, -1, -1):
+        r = NODE_SIZE * k
+        op = nodes[r + NODE_OP]
+        if not nodes[r + NODE_REQUIRES_GRAD] or op == OP_LEAF:
+            continue
+        i = nodes[r + NODE_CHILD_1]
+        j = nodes[r + NODE_CHILD_2]
+        prelude, source_1, source_2 = _BACKWARD_SOURCE[op]
+        # Skip nodes without upstream gradient, as in `_backward_kernel`.
+        lines.append(f"    g = grad[{k}]")
+        lines.append("    if g != 0.0:")
+        if prelude is not None:
+            lines.append("        " + prelude.format(k=k, i=i, j=j))
+        if nodes[NODE_SIZE * i + NODE_REQUIRES_GRAD]:
+            lines.append("        " + source_1.format(k=k, i=i, j=j))
+        if j >= 0 and nodes[NODE_SIZE * j + NODE_REQUIRES_GRAD]:
+            lines.append("        " + source_2.format(k=k, i=i, j=j))
+
+    namespace = {"log": log}
+    exec("\n".join(lines), namespace)
+    backward = namespace["_backward"]
+    if njit is not None:
+        backward = njit(fastmath=_FASTMATH)(backward)
+    return backward
+
+
+class Tape:
+    r"""This class records a computational graph as a structure of arrays.
+
+    Each node of the graph occupies one slot in every array. The arrays are Python `array`
+    objects and grow geometrically when new nodes are recorded.
+
+    Values and gradients are kept in separate arrays since they are also accessed for the children
+    of a node. The integer fields of a node are packed into a record of `NODE_SIZE` consecutive
+    entries of `nodes` so that the backward pass reads them from a single cache line. The field
+    `NODE_CHILD_1` of node `k` is for example stored at `nodes[NODE_SIZE * k + NODE_CHILD_1]`.
+
+    Floating point fields are stored in double precision by default. Single precision halves the
+    memory traffic of the backward pass on large graphs at the cost of accuracy.
+
+    Attributes:
+        typecode: Type code of the floating point arrays, `"d"` for double or `"f"` for single
+            precision.
+        data: Array holding the nodes' values.
+        grad: Array holding the nodes' gradients.
+        arg: Array holding the argument of the operation.
+        const: Array holding the constant operand of the operation, i.e. the exponent of a power.
+        nodes: Array holding the records of the nodes. A record holds the indices of the first and
+            second child or `NO_CHILD`, the operation code from which the node was created, and
+            whether a gradient is computed for the node.
+    """
+
+    def __init__(self, typecode: str = "d") -> None:
+        """Initializes an empty tape.
+
+        Args:
+            typecode: Type code of the floating point arrays, `"d"` or `"f"`.
+        """
+        if typecode not in ("d", "f"):
+            raise ValueError(f"Type code must be 'd' or 'f', got {typecode!r}.")
+        self.typecode = typecode
+        self.data = array(typecode)
+        self.grad = array(typecode)
+        self.arg = array(typecode)
+        self.const = array(typecode)
+        self.nodes = array("q")
+
+        # Cached wave schedule of the nodes recorded up to the last root.
+        # Built during first parallel backward pass.
+        self._waves = None
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+    def alloc(
+        self,
+        data: float,
+        op: int = OP_LEAF,
+        child_1: int = NO_CHILD,
+        child_2: int = NO_CHILD,
+        arg: float = 0.0,
+        requires_grad: bool = True,
+        const: float = 0.0,
+    ) -> int:
+        """Records a new node on the tape.
+
+        Parent nodes require a gradient if at least one of their children does. The argument
+        `requires_grad` is therefore only used for leaf nodes.
+
+        Args:
+            data: Value of node.
+            op: Operation code.
+            child_1: Index of first child.
+            child_2: Index of second child.
+            arg: Argument of operation.
+            requires_grad: Whether a gradient is computed for a leaf node.
+            const: Constant operand of operation.
+
+        Returns:
+            Index of the new node.
+        """
+        index = len(self.data)
+        self.data.append(data)
+        self.grad.append(0.0)
+        self.arg.append(arg)
+        self.const.append(const)
+        nodes = self.nodes
+        if child_1 >= 0:
+            requires_grad = nodes[NODE_SIZE * child_1 + NODE_REQUIRES_GRAD] or (
+                child_2 >= 0 and nodes[NODE_SIZE * child_2 + NODE_REQUIRES_GRAD]
+            )
+        nodes.extend((child_1, child_2, op, requires_grad))
+        return index
+
+    def record(self, root: Value, index: Union[dict, None] = None) -> int:
+        """Records the graph of a :class:`pygrad.engine.Value` node on the tape.
+
+        Nodes are recorded in topological order. Children that do not require a gradient are
+        recorded as leaves holding their data, since no gradient flows through them. Afterwards,
+        gradients of the graph can be computed with any backward pass of the tape, and its data can
+        be recomputed with `forward`.
+
+        Args:
+            root: Root node of the graph.
+            index: Mapping from nodes to their indices on the tape, which is updated in place.
+                Nodes already contained are not recorded again. Pass a dictionary to look up the
+                indices of leaves or to record several graphs sharing nodes.
+
+        Returns:
+            Index of the root node on the tape.
+        """
+        if index is None:
+            index = {}
+
+        def child_index(child: Union[Value, None]) -> int:
+            if child is None:
+                return NO_CHILD
+            if child not in index:
+                index[child] = self.alloc(child.data, requires_grad=False)
+            return index[child]
+
+        for node in root._build_topo():
+            if node in index:
+                continue
+            if node.child_1 is None:
+                index[node] = self.alloc(node.data, requires_grad=node.requires_grad)
+            else:
+                index[node] = self.alloc(
+                    node.data,
+                    node._op,
+                    child_index(node.child_1),
+                    child_index(node.child_2),
+                    node._arg if node._op == OP_POW or node._op == OP_CONST else 0.0,
+                    const=node._const,
+                )
+        return index[root]
+
+    def backward(self, root: int, parallel: bool = False) -> None:
+        """Backward pass to compute gradients for all nodes recorded up to the root node.
+
+        Gradients of all nodes up to the root are reset before the pass.
+
+        Args:
+            root: Index of root node.
+            parallel: If true, process nodes in waves of independent nodes.
+        """
+        # Reset gradients with a single copy instead of one assignment per node.
+        grad = self.grad
+        grad[:root + 1] = array(self.typecode, bytes(grad.itemsize * (root + 1)))
+        grad[root] = 1.0
+        if parallel:
+            _backward_waves_kernel(*self._schedule(root + 1))
+        else:
+            _backward_kernel(root + 1, grad, self.data, self.arg, self.nodes)
+
+    def forward(self, root: int) -> None:
+        """Forward pass to recompute the data of all nodes recorded up to the root node.
+
+        The data of leaf nodes is kept, so that the graph can be replayed for new inputs by
+        overwriting the data of its leaves. Children that did not require a gradient when a graph
+        was recorded with `record` are leaves of the tape and keep their data as well.
+
+        Args:
+            root: Index of root node.
+        """
+        _forward_kernel(root + 1, self.data, self.arg, self.const, self.nodes)
+
+    def compile_backward(self, root: int) -> Callable:
+        """Returns a backward pass specialized to the graph recorded up to the root node.
+
+        The returned function is called with the tape's `grad`, `data`, and `arg` arrays and
+        computes the same gradients as `backward`. Compiled functions are cached for graphs with
+        identical records. This pays off if the graph is rebuilt with the same structure many times,
+        e.g. on a cleared tape during training. Graphs with more than `COMPILE_MAX_NODES` nodes are
+        processed by the generic kernel to bound the compile time.
+
+        Args:
+            root: Index of root node.
+
+        Returns:
+            Backward pass of the graph.
+        """
+        return _compile_backward(self.nodes[:NODE_SIZE * (root + 1)].tobytes())
+
+    def _schedule(self, n: int) -> tuple:
+        """Groups the first `n` nodes into waves and collects the parents of each node.
+
+        The schedule is cached until it is requested for a different number of nodes. It only
+        holds the structure of the graph, which never changes for recorded nodes. Thus, neither
+        appending new nodes nor recomputing data with `forward` invalidates it.
+
+        Args:
+            n: Number of nodes.
+
+        Returns:
+            Arguments of the wave-based backward kernel.
+        """
+        if self._waves is not None and self._waves[0] == n:
+            return self._waves[1]
+
+        level = array("q", bytes(8 * n))
+        num_waves = _levels_kernel(n, self.nodes, level) + 1
+
+        wave_ptr = array("q", bytes(8 * (num_waves + 2)))
+        order = array("q", bytes(8 * n))
+        parent_ptr = array("q", bytes(8 * (n + 2)))
+        parent_edge = array("q", bytes(16 * n))
+        _schedule_kernel(n, self.nodes, level, wave_ptr, order, parent_ptr, parent_edge)
+
+        schedule = (
+            num_waves, self.grad, self.data, self.arg, self.nodes, wave_ptr, order, parent_ptr,
+            parent_edge
+        )
+        self._waves = (n, schedule)
+        return schedule
+
+    def clear(self) -> None:
+        """Removes all nodes from the tape.
+
+        Handles to nodes of a cleared tape must not be used anymore.
+        """
+        self.__init__(self.typecode)
+
+
+# Default tape on which new nodes are recorded.
+_tape = Tape()
+
+
+def get_tape() -> Tape:
+    """Returns the default tape."""
+    return _tape
+
+
+def trace(fn: Callable, *example_inputs: float) -> Callable:
+    """Traces a function and returns a function computing its value and gradients.
+
+    The function is evaluated on a private tape. The backward pass is compiled once for the traced
+    graph and reused as long as the graph keeps its structure. Functions whose structure depends on
+    the inputs are compiled once per structure.
+
+        Typical usage example:
+
+        .. code:: python
+
+            from pygrad.tape import trace
+
+            value_and_grad = trace(lambda x, y: (x * y).tanh(), 1.0, 2.0)
+            out, (x_grad, y_grad) = value_and_grad(0.5, -1.5)
+
+    Args:
+        fn: Function applying operations to its arguments.
+        example_inputs: Floats with which the function is traced.
+
+    Returns:
+        Function taking floats and returning the function's value and a tuple of gradients.
+    """
+    tape = Tape()
+
+    def value_and_grad(*inputs: float) -> tuple:
+        tape.clear()
+        leaves = [TapeValue(data=x, tape=tape) for x in inputs]
+        out = fn(*leaves)
+        tape.compile_backward(out.index)(tape.grad, tape.data, tape.arg)
+        return out.data, tuple(leaf.grad for leaf in leaves)
+
+    value_and_grad(*example_inputs)
+    return value_and_grad
+
+
+def jit(fn: Callable, *example_inputs: float) -> Callable:
+    """Records a function once and returns a function replaying its value and gradients.
+
+    In contrast to :func:`trace`, the function is evaluated only once. Later calls overwrite the
+    data of the recorded leaves and run the forward and backward pass over the tape without any
+    Python call per operation. Both passes are compiled if Numba is installed. The structure of the
+    graph must therefore not depend on the inputs. Data-dependent branches of operations such as
+    ReLU are fine since they are evaluated during the forward pass.
+
+        Typical usage example:
+
+        .. code:: python
+
+            from pygrad.tape import jit
+
+            value_and_grad = jit(lambda x, y: (x * y).tanh(), 1.0, 2.0)
+            out, (x_grad, y_grad) = value_and_grad(0.5, -1.5)
+
+    Args:
+        fn: Function applying operations to its arguments.
+        example_inputs: Floats with which the function is recorded.
+
+    Returns:
+        Function taking floats and returning the function's value and a tuple of gradients.
+    """
+    tape = Tape()
+    leaves = [TapeValue(data=x, tape=tape).index for x in example_inputs]
+    root = fn(*[TapeValue._from_index(tape, index) for index in leaves]).index
+
+    def value_and_grad(*inputs: float) -> tuple:
+        data = tape.data
+        for index, x in zip(leaves, inputs):
+            data[index] = x
+        tape.forward(root)
+        tape.backward(root)
+        grad = tape.grad
+        return data[root], tuple(grad[index] for index in leaves)
+
+    return value_and_grad
+
+
+class TapeValue:
+    r"""This class represents a handle to a node recorded on a tape.
+
+    Operations performed on instances of TapeValue record a new node on the tape of the operands
+    and return a handle to it.
+
+    Attributes:
+        tape: Tape on which the node is recorded.
+        index: Index of the node on the tape.
+    """
+    __slots__ = ("tape", "index")
+
+    def __init__(self, data: float, tape: Tape = None, requires_grad: bool = True) -> None:
+        """Records a leaf node holding the provided data.
+
+        Args:
+            data: Value of leaf node.
+            tape: Tape to record node on. Defaults to the default tape.
+            requires_grad: If false, no gradient is computed for the node, e.g. for fixed inputs.
+        """
+        self.tape = _tape if tape is None else tape
+        self.index = self.tape.alloc(data, requires_grad=requires_grad)
+
+    @classmethod
+    def _from_index(cls, tape: Tape, index: int) -> TapeValue:
+        """Creates a handle to an already recorded node."""
+        out = cls.__new__(cls)
+        out.tape = tape
+        out.index = index
+        return out
+
+    @property
+    def data(self) -> float:
+        return self.tape.data[self.index]
+
+    @property
+    def grad(self) -> float:
+        return self.tape.grad[self.index]
+
+    @property
+    def requires_grad(self) -> bool:
+        return bool(self.tape.nodes[NODE_SIZE * self.index + NODE_REQUIRES_GRAD])
+
+    def backward(self, parallel: bool = False) -> None:
+        """Backward pass to compute gradients for each node recorded before this node.
+
+        Args:
+            parallel: If true, process nodes in waves of independent nodes.
+        """
+        self.tape.backward(self.index, parallel=parallel)
+
+    def _affine(self, data: float, arg: float, const: float = 0.0) -> TapeValue:
+        """Records the affine operation `arg * x + const` of this node and a constant operand.
+
+        Constant operands are not recorded as nodes and receive no gradient.
+        """
+        tape = self.tape
+        k = tape.alloc(data, OP_CONST, self.index, arg=arg, const=const)
+        return TapeValue._from_index(tape, k)
+
+    def __add__(self, other: Union[TapeValue, float]) -> TapeValue:
+        r"""Records addition of two nodes.
+
+        .. math::
+            f(x, y) = x + y \\
+            \frac{df(x, y)}{dx} = 1 \\
+            \frac{df(x, y)}{dy} = 1
+
+        Args:
+            other: Handle to graph node or constant.
+
+        Returns:
+            Handle to a new parent graph node.
+        """
+        if isinstance(other, TapeValue):
+            tape = self.tape
+            data = tape.data
+            i, j = self.index, other.index
+            k = tape.alloc(data[i] + data[j], OP_ADD, i, j)
+            return TapeValue._from_index(tape, k)
+        if other == 0:
+            return self
+        return self._affine(self.data + other, 1.0, other)
+
+    def __sub__(self, other: Union[TapeValue, float]) -> TapeValue:
+        r"""Records subtraction of two nodes.
+
+        .. math::
+            f(x, y) = x - y \\
+            \frac{df(x, y)}{dx} = 1 \\
+            \frac{df(x, y)}{dy} = -1
+
+        Args:
+            other: Handle to graph node or constant.
+
+        Returns:
+            Handle to a new parent graph node.
+        """
+        if isinstance(other, TapeValue):
+            tape = self.tape
+            data = tape.data
+            i, j = self.index, other.index
+            k = tape.alloc(data[i] - data[j], OP_SUB, i, j)
+            return TapeValue._from_index(tape, k)
+        if other == 0:
+            return self
+        return self._affine(self.data - other, 1.0, -other)
+
+    def __mul__(self, other: Union[TapeValue, float]) -> TapeValue:
+        r"""Records multiplication of two nodes.
+
+        .. math::
+            f(x, y) = x * y \\
+            \frac{df(x, y)}{dx} = y \\
+            \frac{df(x, y)}{dy} = x
+
+        Args:
+            other: Handle to graph node or constant.
+
+        Returns:
+            Handle to a new parent graph node.
+        """
+        if isinstance(other, TapeValue):
+            tape = self.tape
+            data = tape.data
+            i, j = self.index, other.index
+            k = tape.alloc(data[i] * data[j], OP_MUL, i, j)
+            return TapeValue._from_index(tape, k)
+        if other == 1:
+            return self
+        return self._affine(self.data * other, float(other))
+
+    def __truediv__(self, other: Union[TapeValue, float]) -> TapeValue:
+        r"""Records division of two nodes.
+
+        .. math::
+            f(x, y) = x / y \\
+            \frac{df(x, y)}{dx} = 1 / y \\
+            \frac{df(x, y)}{dy} = - x / y^2
+
+        Args:
+            other: Handle to graph node or constant.
+
+        Returns:
+            Handle to a new parent graph node.
+        """
+        if isinstance(other, TapeValue):
+            tape = self.tape
+            data = tape.data
+            i, j = self.index, other.index
+            k = tape.alloc(data[i] / data[j], OP_DIV, i, j)
+            return TapeValue._from_index(tape, k)
+        if other == 1:
+            return self
+        return self._affine(self.data / other, 1.0 / other)
+
+    def __radd__(self, other: float) -> TapeValue:
+        r"""Records addition of a constant and a node.
+
+        Args:
+            other: Constant.
+
+        Returns:
+            Handle to a new parent graph node.
+        """
+        if other == 0:
+            return self
+        return self._affine(other + self.data, 1.0, other)
+
+    def __rsub__(self, other: float) -> TapeValue:
+        r"""Records subtraction of a node from a constant.
+
+        .. math::
+            f(x; c) = c - x \\
+            \frac{df(x)}{dx} = -1
+
+        Args:
+            other: Constant.
+
+        Returns:
+            Handle to a new parent graph node.
+        """
+        return self._affine(other - self.data, -1.0, other)
+
+    def __rmul__(self, other: float) -> TapeValue:
+        r"""Records multiplication of a constant and a node.
+
+        Args:
+            other: Constant.
+
+        Returns:
+            Handle to a new parent graph node.
+        """
+        if other == 1:
+            return self
+        return self._affine(other * self.data, float(other))
+
+    def __rtruediv__(self, other: float) -> TapeValue:
+        r"""Records division of a constant by a node.
+
+        .. math::
+            f(x; c) = c / x \\
+            \frac{df(x)}{dx} = - c / x^2
+
+        Args:
+            other: Constant.
+
+        Returns:
+            Handle to a new parent graph node.
+        """
+        # Compose reciprocal and scaling, since the quotient is not affine in the node.
+        return self ** -1 * other
+
+    def __pow__(self, power: Union[float, int]) -> TapeValue:
+        r"""Records power of a node.
+
+        .. math::
+            f(x; n) = x^n \\
+            \frac{df(x)}{dx} = n * x^(n-1)
+
+        Args:
+            power: A float or an integer, the exponent.
+
+        Returns:
+            Handle to a new parent graph node.
+        """
+        tape = self.tape
+        i = self.index
+        data, grad = _pow(tape.data[i], power)
+        k = tape.alloc(data, OP_POW, i, arg=grad, const=power)
+        return TapeValue._from_index(tape, k)
+
+    def __neg__(self) -> TapeValue:
+        r"""Records negation of a node.
+
+        .. math::
+            f(x) = -1*x \\
+            \frac{df(x)}{dx} = -1
+
+        Returns:
+            Handle to a new parent graph node.
+        """
+        tape = self.tape
+        i = self.index
+        k = tape.alloc(-tape.data[i], OP_NEG, i)
+        return TapeValue._from_index(tape, k)
+
+    def tanh(self) -> TapeValue:
+        r"""Records hyperbolic tangent of a node.
+
+        .. math::
+            f(x) = tanh(x) \\
+            \frac{df(x)}{dx} = 1 - tanh(x)^2
+
+        Returns:
+            Handle to a new parent graph node.
+        """
+        tape = self.tape
+        i = self.index
+        k = tape.alloc(tanh(tape.data[i]), OP_TANH, i)
+        return TapeValue._from_index(tape, k)
+
+    def relu(self) -> TapeValue:
+        r"""Records ReLU of a node.
+
+        .. math::
+            f(x) = \text{ReLU}(x) = \max(0, x)
+
+        Returns:
+            Handle to a new parent graph node.
+        """
+        tape = self.tape
+        i = self.index
+        x = tape.data[i]
+        k = tape.alloc(x if x > 0.0 else 0.0, OP_RELU, i)
+        return TapeValue._from_index(tape, k)
+
+    def __repr__(self) -> str:
+        return f"id = {self.index}\t data = {self.data:.3f}\t grad = {self.grad:.3f}"
@@ -0,0 +1,360 @@
+r"""A vector-valued automatic differentiation engine.
+
+This module implements the operations of :mod:`pygrad.engine` for nodes holding NumPy arrays.
+Applying the same computation to many independent scalars, e.g. a minibatch, then costs a single
+ufunc call per operation instead of one Python call per scalar. All operations act elementwise and
+broadcast their operands, so that a batch can be combined with shared parameters. Gradients of
+broadcast operands are summed over the broadcast axes. Requires NumPy.
+
+For large graphs, the backward pass can process independent nodes on worker threads. Nodes are
+grouped into levels of the same longest distance from the leaves. The gradients a level propagates
+to its children are computed concurrently, since NumPy releases the GIL in most ufuncs, and are
+then accumulated in order.
+
+    Typical usage example:
+
+    .. code:: python
+
+        import numpy as np
+
+        from pygrad.vector import VectorValue
+
+        a = VectorValue(data=np.array([2.0, -1.0]))
+        b = VectorValue(data=np.array([3.0, 0.5]))
+
+        out = a * b + a
+        out = out.tanh()
+
+        out.backward()
+"""
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Union
+
+import numpy as np
+
+from .engine import (
+    OP_ADD, OP_DIV, OP_LEAF, OP_MUL, OP_NEG, OP_POW, OP_RELU, OP_SUB, OP_TANH, Value
+)
+
+
+def _unbroadcast(grad: np.ndarray, shape: tuple) -> np.ndarray:
+    """Sums a gradient over the axes along which an operand of the given shape was broadcast.
+
+    Args:
+        grad: Gradient with the shape of the result of an operation.
+        shape: Shape of the operand.
+
+    Returns:
+        Gradient with the shape of the operand.
+    """
+    if grad.shape == shape:
+        return grad
+    grad = grad.sum(axis=tuple(range(grad.ndim - len(shape))))
+    axes = tuple(axis for axis, dim in enumerate(shape) if dim == 1 and grad.shape[axis] != 1)
+    if axes:
+        grad = grad.sum(axis=axes, keepdims=True)
+    return grad
+
+
+# Minimum number of intermediate nodes for which the backward pass uses worker threads. Smaller
+# graphs are processed sequentially since dispatching to threads costs more than it saves.
+PARALLEL_MIN_NODES = 64
+
+
+def _vector_grads(
+    op: int, grad: np.ndarray, out: np.ndarray, x: np.ndarray, y: np.ndarray, arg: np.ndarray
+) -> tuple:
+    """Computes the gradients propagated from a node to its children.
+
+    Args:
+        op: Operation code of node.
+        grad: Gradient of node.
+        out: Data of node.
+        x: Data of first child.
+        y: Data of second child or `None`.
+        arg: Argument of operation or `None`.
+
+    Returns:
+        Tuple holding the gradients propagated to the first and second child.
+    """
+    if op == OP_ADD:
+        return grad, grad
+    if op == OP_SUB:
+        return grad, -grad
+    if op == OP_MUL:
+        return grad * y, grad * x
+    if op == OP_DIV:
+        inv = 1.0 / y
+        grad_child_1 = grad * inv
+        return grad_child_1, -grad_child_1 * x * inv
+    if op == OP_POW:
+        return grad * arg, None
+    if op == OP_NEG:
+        return -grad, None
+    if op == OP_TANH:
+        return grad * (1.0 - out * out), None
+    if op == OP_RELU:
+        return grad * (x > 0.0), None
+    return None, None
+
+
+def _propagate(node: VectorValue) -> tuple:
+    """Computes the gradients propagated from a node to its children.
+
+    Args:
+        node: Intermediate graph node.
+
+    Returns:
+        Tuple holding the gradients of the first and second child, reduced to their shapes, or
+        `None` for children that do not require a gradient.
+    """
+    child_1 = node.child_1
+    child_2 = node.child_2
+    grad_child_1, grad_child_2 = _vector_grads(
+        node._op, node.grad, node.data, child_1.data,
+        None if child_2 is None else child_2.data, node._arg
+    )
+    if child_1.requires_grad:
+        grad_child_1 = _unbroadcast(grad_child_1, child_1.data.shape)
+    else:
+        grad_child_1 = None
+    if child_2 is not None and child_2.requires_grad:
+        grad_child_2 = _unbroadcast(grad_child_2, child_2.data.shape)
+    else:
+        grad_child_2 = None
+    return grad_child_1, grad_child_2
+
+
+def _accumulate(
+    node: VectorValue,
+    grad_child_1: Union[np.ndarray, None],
+    grad_child_2: Union[np.ndarray, None],
+) -> None:
+    """Adds the gradients propagated from a node to the gradients of its children."""
+    if grad_child_1 is not None:
+        node.child_1.grad += grad_child_1
+    if grad_child_2 is not None:
+        node.child_2.grad += grad_child_2
+
+
+class VectorValue:
+    r"""This class represents a vector-valued node of a dynamically built directed acyclic graph.
+
+    VectorValue mirrors :class:`pygrad.engine.Value` but holds an array instead of a float. The
+    data of both operands of an operation must be broadcastable to a common shape.
+
+    Attributes:
+        data: An array holding the node's values.
+        grad: An array holding the node's gradients.
+        child_1: Pointer from parent to first child node.
+        child_2: Pointer from parent to second child node.
+        requires_grad: A boolean indicating whether a gradient is computed for the node.
+    """
+    __slots__ = (
+        "data", "grad", "child_1", "child_2", "requires_grad", "_op", "_arg", "_topo", "_levels"
+    )
+
+    def __init__(
+        self, data: np.ndarray, requires_grad: bool = True, dtype: np.dtype = np.float64
+    ) -> None:
+        """Initializes VectorValue with provided data and zero gradient.
+
+        Args:
+            data: An array holding the node's values.
+            requires_grad: If false, no gradient is computed for the node, e.g. for fixed inputs.
+            dtype: Floating point type of the node's values, e.g. `np.float32` to halve the
+                memory traffic of large batches. Results of operations keep the type of their
+                operands.
+        """
+        self.data = np.asarray(data, dtype=dtype)
+        self.grad = np.zeros_like(self.data)
+        self.child_1 = None
+        self.child_2 = None
+        self.requires_grad = requires_grad
+        self._op = OP_LEAF
+        self._arg = None
+        self._topo = None
+        self._levels = None
+
+    @classmethod
+    def _binop(
+        cls,
+        data: np.ndarray,
+        op: int,
+        child_1: VectorValue,
+        child_2: Union[VectorValue, None] = None,
+        arg: Union[np.ndarray, None] = None,
+    ) -> VectorValue:
+        """Creates a new parent node with all fields set at once.
+
+        Args:
+            data: Result of forward pass.
+            op: Operation code.
+            child_1: First child node.
+            child_2: Second child node or `None`.
+            arg: Argument of operation or `None`.
+
+        Returns:
+            A new parent graph node.
+        """
+        out = cls.__new__(cls)
+        out.data = data
+        out.grad = None
+        out.child_1 = child_1
+        out.child_2 = child_2
+        out.requires_grad = child_1.requires_grad or (
+            child_2 is not None and child_2.requires_grad
+        )
+        out._op = op
+        out._arg = arg
+        out._topo = None
+        out._levels = None
+        return out
+
+    # Graph traversal does not depend on the type of data.
+    _build_topo = Value._build_topo
+
+    def backward(self, parallel: bool = False) -> None:
+        """Backward pass to compute gradients for each node of the computational graph.
+
+        Gradients of leaf nodes are accumulated across calls whereas gradients of intermediate
+        nodes are reset before each pass. The reverse topological order of intermediate nodes is
+        cached on the root node as in :meth:`pygrad.engine.Value.backward`.
+
+        Args:
+            parallel: If true, process independent nodes on worker threads. Ignored for graphs
+                with less than `PARALLEL_MIN_NODES` intermediate nodes.
+        """
+        if self._topo is None:
+            self._topo = [node for node in reversed(self._build_topo()) if node.child_1 is not None]
+        topo = self._topo
+
+        # Reset gradients of intermediate nodes from previous backward passes.
+        for node in topo:
+            node.grad = np.zeros_like(node.data)
+
+        # Set root node's gradient of directed acyclic graph to one.
+        self.grad = np.ones_like(self.data)
+
+        if parallel and len(topo) >= PARALLEL_MIN_NODES:
+            if self._levels is None:
+                self._levels = self._build_levels()
+            with ThreadPoolExecutor() as executor:
+                # All parents of a level belong to later levels and are complete.
+                for level in reversed(self._levels):
+                    for node, grads in zip(level, executor.map(_propagate, level)):
+                        _accumulate(node, *grads)
+        else:
+            for node in topo:
+                _accumulate(node, *_propagate(node))
+
+    def _build_levels(self) -> list:
+        """Groups the intermediate nodes by their longest distance from the leaves.
+
+        Returns:
+            List of levels, each holding a list of nodes. Children of a node belong to earlier
+            levels.
+        """
+        depth = {}
+        levels = []
+        for node in reversed(self._topo):
+            d = 0
+            for child in (node.child_1, node.child_2):
+                if child in depth and depth[child] >= d:
+                    d = depth[child] + 1
+            depth[node] = d
+            if d == len(levels):
+                levels.append([])
+            levels[d].append(node)
+        return levels
+
+    def zero_grad_tree(self) -> None:
+        """Resets the gradients of all nodes of the graph rooted at this node to zero."""
+        for node in self._build_topo():
+            node.grad = np.zeros_like(node.data)
+
+    def __add__(self, other: VectorValue) -> VectorValue:
+        r"""Implements elementwise addition of nodes.
+
+        Args:
+            other: Graph node.
+
+        Returns:
+            A new parent graph node.
+        """
+        return VectorValue._binop(np.add(self.data, other.data), OP_ADD, self, other)
+
+    def __sub__(self, other: VectorValue) -> VectorValue:
+        r"""Implements elementwise subtraction of nodes.
+
+        Args:
+            other: Graph node.
+
+        Returns:
+            A new parent graph node.
+        """
+        return VectorValue._binop(np.subtract(self.data, other.data), OP_SUB, self, other)
+
+    def __mul__(self, other: VectorValue) -> VectorValue:
+        r"""Implements elementwise multiplication of nodes.
+
+        Args:
+            other: Graph node.
+
+        Returns:
+            A new parent graph node.
+        """
+        return VectorValue._binop(np.multiply(self.data, other.data), OP_MUL, self, other)
+
+    def __truediv__(self, other: VectorValue) -> VectorValue:
+        r"""Implements elementwise division of nodes.
+
+        Args:
+            other: Graph node.
+
+        Returns:
+            A new parent graph node.
+        """
+        return VectorValue._binop(np.divide(self.data, other.data), OP_DIV, self, other)
+
+    def __pow__(self, power: Union[float, int]) -> VectorValue:
+        r"""Implements elementwise power of a node.
+
+        Args:
+            power: A float or an integer, the exponent.
+
+        Returns:
+            A new parent graph node.
+        """
+        x = self.data
+        grad = power * np.power(x, power - 1)
+        return VectorValue._binop(np.power(x, power), OP_POW, self, arg=grad)
+
+    def __neg__(self) -> VectorValue:
+        r"""Implements elementwise negation of a node.
+
+        Returns:
+            A new parent graph node.
+        """
+        return VectorValue._binop(np.negative(self.data), OP_NEG, self)
+
+    def tanh(self) -> VectorValue:
+        r"""Implements elementwise hyperbolic tangent of a node.
+
+        Returns:
+            A new parent graph node.
+        """
+        return VectorValue._binop(np.tanh(self.data), OP_TANH, self)
+
+    def relu(self) -> VectorValue:
+        r"""Implements elementwise ReLU of a node.
+
+        Returns:
+            A new parent graph node.
+        """
+        return VectorValue._binop(np.maximum(self.data, 0.0), OP_RELU, self)
+
+    def __repr__(self) -> str:
+        return f"id = {id(self)}\t data = {self.data}\t grad = {self.grad}"
@@ -1,20 +1,67 @@
+import logging
+from math import isclose, tanh
+
 import jax
+import pytest
 import torch
 
-from pygrad.engine import Value
+from pygrad.engine import _LOCAL_GRADS, Value, _local_grads
 
-places = 5
+abs_tol = 1e-5
 
 
-def test_autograd_1():
+@pytest.fixture(scope="module", autouse=True)
+def _warmup():
+    """Initializes JAX and PyTorch once per module so that no test pays their first-call costs.
+    """
+    jax.grad(lambda x: x)(1.0)
+    torch.tensor([1.0], requires_grad=True).sum().backward()
+
+
+def _fun_1(a_, b_, c_, d_, e_, f_):
+    out_ = a_ + b_
+    out_ = out_ - c_
+    out_ = out_ * d_
+    out_ = out_ / e_
+    out_ = out_ ** f_
+    return out_
+
+
+def _fun_2_pg(a_, b_, c_):
+    out_ = (a_ + b_).tanh()
+    out_ = out_ - a_
+    out_ = out_ * b_
+    out_ = out_ / a_
+    out_ = out_ ** c_
+    return out_
+
+
+def _fun_2_jx(a_, b_, c_):
+    out_ = jax.numpy.tanh(a_ + b_)
+    out_ = out_ - a_
+    out_ = out_ * b_
+    out_ = out_ / a_
+    out_ = out_ ** c_
+    return out_
+
+
+def _fun_3(a_, b_):
+    c = a_ - b_
+    d = a_ * b_
+    e = c / d
+    f = e - d
+    return f
+
 
-    def fun(a_, b_, c_, d_, e_, f_):
-        out_ = a_ + b_
-        out_ = out_ - c_
-        out_ = out_ * d_
-        out_ = out_ / e_
-        out_ = out_ ** f_
-        return out_
+# Reference gradients are compiled once per module. XLA compiles the whole function at once, which
+# is faster than dispatching every operation eagerly.
+_grad_fun_1 = jax.jit(jax.grad(_fun_1, argnums=(0, 1, 2, 3, 4)))
+_grad_fun_2 = jax.jit(jax.grad(_fun_2_jx, argnums=(0, 1, 2)))
+_grad_fun_3 = jax.jit(jax.grad(_fun_3, argnums=(0, 1)))
+
+
+def test_autograd_1():
+    fun = _fun_1
 
     _a = 2.0
     _b = 3.0
@@ -46,36 +93,21 @@ def test_autograd_1():
 
     out = fun(a, b, c, d, e, f)
 
-    a_grad, b_grad, c_grad, d_grad, e_grad = jax.grad(fun, argnums=(0, 1, 2, 3, 4))(a, b, c, d, e, f)
+    a_grad, b_grad, c_grad, d_grad, e_grad = _grad_fun_1(a, b, c, d, e, f)
 
     # Assert correct forward pass
-    assert round(out - out_pg.data, places) == 0
+    assert isclose(out, out_pg.data, abs_tol=abs_tol)
 
     # Assert correct gradients
-    assert round(a_grad - a_pg.grad, places) == 0
-    assert round(b_grad - b_pg.grad, places) == 0
-    assert round(c_grad - c_pg.grad, places) == 0
-    assert round(d_grad - d_pg.grad, places) == 0
-    assert round(e_grad - e_pg.grad, places) == 0
+    assert isclose(a_grad, a_pg.grad, abs_tol=abs_tol)
+    assert isclose(b_grad, b_pg.grad, abs_tol=abs_tol)
+    assert isclose(c_grad, c_pg.grad, abs_tol=abs_tol)
+    assert isclose(d_grad, d_pg.grad, abs_tol=abs_tol)
+    assert isclose(e_grad, e_pg.grad, abs_tol=abs_tol)
 
 
 def test_autograd_2():
-
-    def fun_pg(a_, b_, c_):
-        out_ = (a_ + b_).tanh()
-        out_ = out_ - a_
-        out_ = out_ * b_
-        out_ = out_ / a_
-        out_ = out_ ** c_
-        return out_
-
-    def fun_jx(a_, b_, c_):
-        out_ = jax.numpy.tanh(a_ + b_)
-        out_ = out_ - a_
-        out_ = out_ * b_
-        out_ = out_ / a_
-        out_ = out_ ** c_
-        return out_
+    fun_pg, fun_jx = _fun_2_pg, _fun_2_jx
 
     _a = 2.0
     _b = 3.0
@@ -98,24 +130,18 @@ def test_autograd_2():
 
     out = fun_jx(a, b, c)
 
-    a_grad, b_grad, c_grad = jax.grad(fun_jx, argnums=(0, 1, 2))(a, b, c)
+    a_grad, b_grad, c_grad = _grad_fun_2(a, b, c)
 
     # Assert correct forward pass
-    assert round(out - out_pg.data, places) == 0
+    assert isclose(out, out_pg.data, abs_tol=abs_tol)
 
     # Assert correct gradients
-    assert round(a_grad - a_pg.grad, places) == 0
-    assert round(b_grad - b_pg.grad, places) == 0
+    assert isclose(a_grad, a_pg.grad, abs_tol=abs_tol)
+    assert isclose(b_grad, b_pg.grad, abs_tol=abs_tol)
 
 
 def test_autograd_3():
-
-    def fun(a_, b_):
-        c = a_ - b_
-        d = a_ * b_
-        e = c / d
-        f = e - d
-        return f
+    fun = _fun_3
 
     _a = -3.0
     _b = 5.0
@@ -135,14 +161,14 @@ def test_autograd_3():
 
     out = fun(a, b)
 
-    a_grad, b_grad = jax.grad(fun, argnums=(0, 1))(a, b)
+    a_grad, b_grad = _grad_fun_3(a, b)
 
     # Assert correct forward pass
-    assert round(out - out_pg.data, places) == 0
+    assert isclose(out, out_pg.data, abs_tol=abs_tol)
 
     # Assert correct gradients
-    assert round(a_grad - a_pg.grad, places) == 0
-    assert round(b_grad - b_pg.grad, places) == 0
+    assert isclose(a_grad, a_pg.grad, abs_tol=abs_tol)
+    assert isclose(b_grad, b_pg.grad, abs_tol=abs_tol)
 
 
 def test_autograd_4():
@@ -167,22 +193,17 @@ def test_autograd_4():
     out_pg, x_pg, y_pg = out, x_, y_
 
     # PyTorch
-    x_ = torch.tensor([_x]).double()
-    y_ = torch.tensor([_y]).double()
-    x_.requires_grad = True
-    y_.requires_grad = True
+    x_ = torch.tensor(_x, dtype=torch.float64)
+    y_ = torch.tensor(_y, dtype=torch.float64)
 
-    out = fun(x_, y_)
-    out.backward()
-
-    out_pt, x_pt, y_pt = out, x_, y_
+    (x_grad, y_grad), out = torch.func.grad_and_value(fun, argnums=(0, 1))(x_, y_)
 
     # Assert correct forward pass
-    assert round(out.data.item() - out_pg.data, places) == 0
+    assert isclose(out.item(), out_pg.data, abs_tol=abs_tol)
 
     # Assert correct gradients
-    assert round(x_pt.grad.data.item() - x_pg.grad, places) == 0
-    assert round(y_pt.grad.data.item() - y_pg.grad, places) == 0
+    assert isclose(x_grad.item(), x_pg.grad, abs_tol=abs_tol)
+    assert isclose(y_grad.item(), y_pg.grad, abs_tol=abs_tol)
 
 
 def test_autograd_5():
@@ -221,30 +242,35 @@ def test_autograd_5():
     out_pg, a_pg, b_pg = out, a_, b_
 
     # PyTorch
-    a_ = torch.tensor([_a]).double()
-    b_ = torch.tensor([_b]).double()
-    u_ = torch.tensor([_u]).double()
-    v_ = torch.tensor([_v]).double()
-    w_ = torch.tensor([_w]).double()
-    x_ = torch.tensor([_x]).double()
-    a_.requires_grad = True
-    b_.requires_grad = True
-
-    out = fun(a_, b_, u_, v_, w_, x_)
-    out.backward()
+    a_, b_, u_, v_, w_, x_ = (
+        torch.tensor(z, dtype=torch.float64) for z in (_a, _b, _u, _v, _w, _x)
+    )
 
-    out_pt, a_pt, b_pt = out, a_, b_
+    (a_grad, b_grad), out = torch.func.grad_and_value(fun, argnums=(0, 1))(
+        a_, b_, u_, v_, w_, x_
+    )
 
     # Assert correct forward pass
-    assert round(out.data.item() - out_pg.data, places) == 0
+    assert isclose(out.item(), out_pg.data, abs_tol=abs_tol)
 
     # Assert correct gradients
-    assert round(a_pt.grad.data.item() - a_pg.grad, places) == 0
-    assert round(b_pt.grad.data.item() - b_pg.grad, places) == 0
-
-
-def test_add():
-
+    assert isclose(a_grad.item(), a_pg.grad, abs_tol=abs_tol)
+    assert isclose(b_grad.item(), b_pg.grad, abs_tol=abs_tol)
+
+
+@pytest.mark.parametrize(
+    "op, ref",
+    [
+        (lambda x, y: x + y, lambda x, y: (1.0, 1.0)),
+        (lambda x, y: x - y, lambda x, y: (1.0, -1.0)),
+        (lambda x, y: x * y, lambda x, y: (y, x)),
+        (lambda x, y: x / y, lambda x, y: (1.0 / y, -x / y ** 2)),
+    ],
+    ids=["add", "sub", "mul", "div"],
+)
+def test_binary(op, ref):
+    """Tests binary operations of Value against their analytic gradients.
+    """
     a_ = 2.0
     b_ = -3.0
 
@@ -252,67 +278,91 @@ def test_add():
     a = Value(data=a_)
     b = Value(data=b_)
 
-    out = a + b
+    out = op(a, b)
     out.backward()
 
     out_pg, a_pg, b_pg = out, a, b
 
-    # Jax
-    a = a_
-    b = b_
-
-    fun = lambda x, y: x + y
-    out_data = fun(a, b)
-    a_grad, b_grad = jax.grad(fun, argnums=(0, 1))(a, b)
+    # Analytic
+    out_data = op(a_, b_)
+    a_grad, b_grad = ref(a_, b_)
 
     # Assert correct forward pass
-    assert round(out_data - out_pg.data, places) == 0
+    assert isclose(out_data, out_pg.data, abs_tol=abs_tol)
 
     # Assert correct gradients
-    assert round(a_grad - a_pg.grad, places) == 0
-    assert round(b_grad - b_pg.grad, places) == 0
+    assert isclose(a_grad, a_pg.grad, abs_tol=abs_tol)
+    assert isclose(b_grad, b_pg.grad, abs_tol=abs_tol)
 
 
-def test_sub():
+def test_pow():
 
     a_ = 2.0
-    b_ = -3.0
+    b_ = 3.0
 
     # PyGrad
     a = Value(data=a_)
-    b = Value(data=b_)
+    b = b_
 
-    out = a - b
+    out = a ** b  # pow(a, b)
     out.backward()
 
     out_pg, a_pg, b_pg = out, a, b
 
-    # Jax
-    a = a_
-    b = b_
-
-    fun = lambda x, y: x - y
-    out_data = fun(a, b)
-    a_grad, b_grad = jax.grad(fun, argnums=(0, 1))(a, b)
+    # Analytic
+    out_data = a_ ** b_
+    a_grad = b_ * a_ ** (b_ - 1.0)
 
     # Assert correct forward pass
-    assert round(out_data - out_pg.data, places) == 0
+    assert isclose(out_data, out_pg.data, abs_tol=abs_tol)
 
     # Assert correct gradients
-    assert round(a_grad - a_pg.grad, places) == 0
-    assert round(b_grad - b_pg.grad, places) == 0
+    assert isclose(a_grad, a_pg.grad, abs_tol=abs_tol)
+    # assert isclose(b_grad, b_pg.grad, abs_tol=abs_tol)
+
 
+def test_pow_int():
+    """Tests __pow__() method of Value for small integer and integral float exponents.
+    """
+    a_ = -1.5
+
+    for b_ in [*range(-8, 9), -6.0, 5.0]:
+
+        # PyGrad
+        a = Value(data=a_)
+        b = b_
+
+        out = a ** b
+        out.backward()
+
+        out_pg, a_pg = out, a
+
+        # Jax
+        a = a_
+        b = float(b_)
 
-def test_mul():
+        fun = lambda x, y: x ** y
+        out_data = fun(a, b)
+        a_grad = jax.grad(fun, argnums=0)(a, b)
 
+        # Assert correct forward pass
+        assert isclose(out_data, out_pg.data, abs_tol=abs_tol)
+
+        # Assert correct gradients
+        assert isclose(a_grad, a_pg.grad, abs_tol=abs_tol)
+
+
+def test_pow_val():
+    """Tests pow_val() method of Value.
+    """
     a_ = 2.0
-    b_ = -3.0
+    b_ = -1.5
 
     # PyGrad
     a = Value(data=a_)
     b = Value(data=b_)
 
-    out = a * b
+    out = a.pow_val(b)
     out.backward()
 
     out_pg, a_pg, b_pg = out, a, b
@@ -321,113 +371,106 @@ def test_mul():
     a = a_
     b = b_
 
-    fun = lambda x, y: x * y
+    fun = lambda x, y: x ** y
     out_data = fun(a, b)
     a_grad, b_grad = jax.grad(fun, argnums=(0, 1))(a, b)
 
     # Assert correct forward pass
-    assert round(out_data - out_pg.data, places) == 0
+    assert isclose(out_data, out_pg.data, abs_tol=abs_tol)
 
     # Assert correct gradients
-    assert round(a_grad - a_pg.grad, places) == 0
-    assert round(b_grad - b_pg.grad, places) == 0
+    assert isclose(a_grad, a_pg.grad, abs_tol=abs_tol)
+    assert isclose(b_grad, b_pg.grad, abs_tol=abs_tol)
 
+    # Assert non-positive base is rejected
+    with pytest.raises(ValueError):
+        Value(data=0.0).pow_val(b_pg)
 
-def test_div():
 
+def test_neg():
+    """Tests __neg__() method of Value.
+    """
     a_ = 2.0
-    b_ = -3.0
 
     # PyGrad
     a = Value(data=a_)
-    b = Value(data=b_)
 
-    out = a / b
+    out = -a
     out.backward()
 
-    out_pg, a_pg, b_pg = out, a, b
-
-    # Jax
-    a = a_
-    b = b_
+    out_pg, a_pg= out, a
 
-    fun = lambda x, y: x / y
-    out_data = fun(a, b)
-    a_grad, b_grad = jax.grad(fun, argnums=(0, 1))(a, b)
+    # Analytic
+    out_data = -a_
+    a_grad = -1.0
 
     # Assert correct forward pass
-    assert round(out_data - out_pg.data, places) == 0
+    assert isclose(out_data, out_pg.data, abs_tol=abs_tol)
 
     # Assert correct gradients
-    assert round(a_grad - a_pg.grad, places) == 0
-    assert round(b_grad - b_pg.grad, places) == 0
+    assert isclose(a_grad, a_pg.grad, abs_tol=abs_tol)
 
 
-def test_pow():
+def test_tanh():
 
     a_ = 2.0
-    b_ = 3.0
 
     # PyGrad
     a = Value(data=a_)
-    b = b_
 
-    out = a ** b  # pow(a, b)
+    out = a.tanh()
     out.backward()
 
-    out_pg, a_pg, b_pg = out, a, b
+    out_pg, a_pg = out, a
 
     # Jax
     a = a_
-    b = b_
 
-    fun = lambda x, y: x ** y
-    out_data = fun(a, b)
-    a_grad, b_grad = jax.grad(fun, argnums=(0, 1))(a, b)
+    fun = lambda x: jax.numpy.tanh(x)
+    out_data = fun(a)
+    a_grad = jax.grad(fun, argnums=0)(a)
 
     # Assert correct forward pass
-    assert round(out_data - out_pg.data, places) == 0
+    assert isclose(out_data, out_pg.data, abs_tol=abs_tol)
 
     # Assert correct gradients
-    assert round(a_grad - a_pg.grad, places) == 0
-    # assert round(b_grad - b_pg.grad, places) == 0
+    assert isclose(a_grad, a_pg.grad, abs_tol=abs_tol)
 
 
-def test_neg():
-    """Tests __neg__() method of Value.
-    """
+def test_relu_1():
+
     a_ = 2.0
 
     # PyGrad
     a = Value(data=a_)
 
-    out = -a
+    out = a.relu()
     out.backward()
 
-    out_pg, a_pg= out, a
+    out_pg, a_pg = out, a
 
     # Jax
     a = a_
 
-    fun = lambda x: -x
+    fun = lambda x: x * (x > 0)
     out_data = fun(a)
     a_grad = jax.grad(fun, argnums=0)(a)
 
     # Assert correct forward pass
-    assert round(out_data - out_pg.data, places) == 0
+    assert isclose(out_data, out_pg.data, abs_tol=abs_tol)
 
     # Assert correct gradients
-    assert round(a_grad - a_pg.grad, places) == 0
+    assert isclose(a_grad, a_pg.grad, abs_tol=abs_tol)
 
 
-def test_tanh():
+def test_relu_2():
 
-    a_ = 2.0
+    a_ = -2.0
 
     # PyGrad
     a = Value(data=a_)
 
-    out = a.tanh()
+    out = a.relu()
     out.backward()
 
     out_pg, a_pg = out, a
@@ -435,64 +478,203 @@ def test_tanh():
     # Jax
     a = a_
 
-    fun = lambda x: jax.numpy.tanh(x)
+    fun = lambda x: x * (x > 0)
     out_data = fun(a)
     a_grad = jax.grad(fun, argnums=0)(a)
 
     # Assert correct forward pass
-    assert round(out_data - out_pg.data, places) == 0
+    assert isclose(out_data, out_pg.data, abs_tol=abs_tol)
 
     # Assert correct gradients
-    assert round(a_grad - a_pg.grad, places) == 0
+    assert isclose(a_grad, a_pg.grad, abs_tol=abs_tol)
 
 
-def test_relu_1():
+def test_backward_deep_graph():
+    """Tests backward pass on a graph deeper than the recursion limit.
+    """
+    depth = 5000
+
+    # PyGrad
+    a = Value(data=0.5)
+
+    out = a
+    for _ in range(depth):
+        out = out * Value(data=1.0)
+    out.backward()
+
+    # Assert correct gradients
+    assert isclose(1.0, a.grad, abs_tol=abs_tol)
 
+
+def test_backward_repeated():
+    """Tests that repeated backward passes accumulate gradients of leaf nodes.
+    """
     a_ = 2.0
+    b_ = -3.0
 
     # PyGrad
     a = Value(data=a_)
+    b = Value(data=b_)
 
-    out = a.relu()
+    out = (a * b + a) * a
+    out.backward()
     out.backward()
 
-    out_pg, a_pg = out, a
+    # Assert correct gradients
+    assert isclose(2.0 * (2.0 * a_ * b_ + 2.0 * a_), a.grad, abs_tol=abs_tol)
+    assert isclose(2.0 * a_ * a_, b.grad, abs_tol=abs_tol)
 
-    # Jax
-    a = a_
 
-    fun = lambda x: x * (x > 0)
-    out_data = fun(a)
-    a_grad = jax.grad(fun, argnums=0)(a)
+def test_zero_grad_tree():
+    """Tests that resetting gradients of a graph discards accumulated gradients.
+    """
+    a = Value(data=2.0)
+    b = Value(data=-3.0)
 
-    # Assert correct forward pass
-    assert round(out_data - out_pg.data, places) == 0
+    out = (a * b + a) * a
+    out.backward()
+    out.backward()
+    out.zero_grad_tree()
+
+    # Assert reset gradients
+    assert a.grad == 0.0
+    assert b.grad == 0.0
+
+    out.backward()
 
     # Assert correct gradients
-    assert round(a_grad - a_pg.grad, places) == 0
+    assert isclose(2.0 * a.data * b.data + 2.0 * a.data, a.grad, abs_tol=abs_tol)
+    assert isclose(a.data * a.data, b.grad, abs_tol=abs_tol)
 
 
-def test_relu_2():
+def test_backward_logging(caplog):
+    """Tests that nodes are only traced during backward pass if debug logging is enabled.
+    """
+    a = Value(data=2.0)
+    b = Value(data=-3.0)
 
-    a_ = -2.0
+    out = a * b
+    out.backward()
+    assert not caplog.records
+
+    with caplog.at_level(logging.DEBUG, logger="pygrad.engine"):
+        out.backward()
+    assert len(caplog.records) == 3
+
+
+def test_print(capsys):
+    """Tests that print() traverses the computational graph in depth-first order.
+    """
+    a = Value(data=2.0)
+    b = Value(data=-3.0)
+
+    out = (a * b).relu()
+    out.print()
+
+    lines = capsys.readouterr().out.splitlines()
+    assert lines[1:] == [str(out), str(out.child_1), str(a), "None", "None", str(b), "None", "None",
+                         "None"]
+
+
+def test_requires_grad():
+    """Tests that no gradients are computed for nodes that do not require them.
+    """
+    x_ = 1.5
+    w_ = -2.0
+
+    # PyGrad
+    x = Value(data=x_, requires_grad=False)
+    w = Value(data=w_)
+
+    h = x * x
+    out = (h * w).tanh() + h
+    out.backward()
+
+    # Assert pruned nodes
+    assert not h.requires_grad
+    assert out.requires_grad
+    assert x.grad == 0.0
+    assert h.grad == 0.0
+
+    # Assert correct gradients
+    assert isclose((1.0 - tanh(x_ * x_ * w_) ** 2) * x_ * x_, w.grad, abs_tol=abs_tol)
+
+
+def test_fused_add_tanh():
+    """Tests that the fused addition and hyperbolic tangent matches the unfused operations.
+    """
+    a_ = 0.5
+    b_ = -1.25
 
     # PyGrad
     a = Value(data=a_)
+    b = Value(data=b_)
 
-    out = a.relu()
+    h = a + b
+    out = h.tanh() * h
     out.backward()
 
-    out_pg, a_pg = out, a
+    # Assert fused node
+    assert out.child_1.child_1 is a
+    assert out.child_1.child_2 is b
 
-    # Jax
-    a = a_
+    # Assert correct gradients
+    t = tanh(a_ + b_)
+    grad = (1.0 - t * t) * (a_ + b_) + t
+    assert isclose(grad, a.grad, abs_tol=abs_tol)
+    assert isclose(grad, b.grad, abs_tol=abs_tol)
 
-    fun = lambda x: x * (x > 0)
-    out_data = fun(a)
-    a_grad = jax.grad(fun, argnums=0)(a)
+
+def test_const():
+    """Tests operations with constant operands.
+    """
+    a_ = 1.5
+    b_ = -0.5
+
+    # PyGrad
+    a = Value(data=a_)
+    b = Value(data=b_)
+
+    h = 2.0 * a + 1.0
+    out = (h - 3.0) * (4.0 - b) / 5.0 + 6.0 / a + b * 7.0
+    out.backward()
+
+    # Assert constants are not recorded
+    assert h.child_2 is None
+    assert h.child_1.child_2 is None
 
     # Assert correct forward pass
-    assert round(out_data - out_pg.data, places) == 0
+    assert isclose(
+        (2.0 * a_ - 2.0) * (4.0 - b_) / 5.0 + 6.0 / a_ + 7.0 * b_, out.data, abs_tol=abs_tol
+    )
 
     # Assert correct gradients
-    assert round(a_grad - a_pg.grad, places) == 0
+    assert isclose(2.0 * (4.0 - b_) / 5.0 - 6.0 / (a_ * a_), a.grad, abs_tol=abs_tol)
+    assert isclose(-(2.0 * a_ - 2.0) / 5.0 + 7.0, b.grad, abs_tol=abs_tol)
+
+
+def test_identity_folds():
+    """Tests that identity operations return their operand instead of allocating new nodes.
+    """
+    a = Value(data=-2.0)
+
+    # Assert folded operations
+    assert a + 0.0 is a
+    assert a - 0.0 is a
+    assert 0.0 + a is a
+    assert 1.0 * a is a
+    assert a / 1 is a
+
+    # Assert inactive ReLU units are recorded and pass the root gradient
+    out = a.relu()
+    out.backward()
+    assert out.child_1 is a
+    assert out.grad == 1.0
+    assert a.grad == 0.0
+
+
+def test_local_grads_table():
+    """Tests that the table of local gradients matches the generic function for every operation.
+    """
+    for op in range(1, len(_LOCAL_GRADS)):
+        assert _LOCAL_GRADS[op](0.25, 1.5, 2.0, 3.0) == _local_grads(op, 0.25, 1.5, 2.0, 3.0)
@@ -0,0 +1,59 @@
+from math import isclose
+
+from pygrad.engine import Value
+from pygrad.forward import Dual, jvp
+
+abs_tol = 1e-5
+
+
+def test_forward_single_ops():
+    """Tests that forward mode computes the same derivatives as reverse mode for single operations.
+    """
+    funs = [
+        lambda x: -x,
+        lambda x: x.tanh(),
+        lambda x: x.relu(),
+        lambda x: x ** 3,
+        lambda x: x ** -6,
+        lambda x: (x * x) ** 1.25,
+    ]
+
+    for fun in funs:
+        for x_ in [-1.5, 0.75]:
+            out_fw, grad_fw = jvp(fun, x_)
+
+            # PyGrad
+            x = Value(data=x_)
+            out = fun(x)
+            out.backward()
+
+            # Assert correct forward pass
+            assert isclose(out_fw, out.data, abs_tol=abs_tol)
+
+            # Assert correct gradients
+            assert isclose(grad_fw, x.grad, abs_tol=abs_tol)
+
+
+def test_forward_autograd():
+    """Tests that forward mode computes the same derivative as reverse mode for a composition.
+    """
+
+    def fun(x, c):
+        y = (x * c + 1.0).tanh() - 2.0 / x
+        z = (y * y - x).relu() + (3.0 - y) / (x + c)
+        return z * y ** 2 - x
+
+    x_ = 0.5
+
+    out_fw, grad_fw = jvp(lambda x: fun(x, Dual(-1.5)), x_)
+
+    # PyGrad
+    x = Value(data=x_)
+    out = fun(x, Value(data=-1.5, requires_grad=False))
+    out.backward()
+
+    # Assert correct forward pass
+    assert isclose(out_fw, out.data, abs_tol=abs_tol)
+
+    # Assert correct gradients
+    assert isclose(grad_fw, x.grad, abs_tol=abs_tol)
@@ -0,0 +1,498 @@
+from math import isclose, tanh
+
+import torch
+
+from pygrad.engine import _LOCAL_GRADS, Value
+from pygrad.tape import _BACKWARD_SOURCE, Tape, TapeValue, jit, trace
+
+abs_tol = 1e-5
+
+
+def test_tape_autograd_1():
+
+    def fun(a, b, u, v, w, x):
+        c = a + b
+        d = a * b + b ** 3
+        c = c + c + u
+        c = c + u + c + (-a)
+        d = d + d * v + (b + a).relu()
+        d = d + w * d + (b - a).relu()
+        e = c - d
+        f = e ** 2
+        g = f / v
+        g = g + x / f
+        return g.tanh()
+
+    inputs = (-3.0, 2.0, 1.0, 2.0, 3.0, 10.0)
+
+    # Tape
+    tape = Tape()
+    leaves_tp = [TapeValue(data=x, tape=tape) for x in inputs]
+    out_tp = fun(*leaves_tp)
+    out_tp.backward()
+
+    # PyGrad
+    leaves_pg = [Value(data=x) for x in inputs]
+    out_pg = fun(*leaves_pg)
+    out_pg.backward()
+
+    # Assert correct forward pass
+    assert isclose(out_tp.data, out_pg.data, abs_tol=abs_tol)
+
+    # Assert correct gradients
+    for leaf_tp, leaf_pg in zip(leaves_tp, leaves_pg):
+        assert isclose(leaf_tp.grad, leaf_pg.grad, abs_tol=abs_tol)
+
+
+def test_tape_autograd_2():
+
+    def fun(x, y):
+        z = y * x + y + x
+        q = z.relu() + z * x
+        h = (z * z).relu()
+        y = h + q + q * x
+        return y
+
+    _x = -4.0
+    _y = 2.0
+
+    # Tape
+    tape = Tape()
+    x_ = TapeValue(_x, tape=tape)
+    y_ = TapeValue(_y, tape=tape)
+
+    out = fun(x_, y_)
+    out.backward()
+
+    out_tp, x_tp, y_tp = out, x_, y_
+
+    # PyTorch
+    x_ = torch.tensor(_x, dtype=torch.float64)
+    y_ = torch.tensor(_y, dtype=torch.float64)
+
+    (x_grad, y_grad), out = torch.func.grad_and_value(fun, argnums=(0, 1))(x_, y_)
+
+    # Assert correct forward pass
+    assert isclose(out.item(), out_tp.data, abs_tol=abs_tol)
+
+    # Assert correct gradients
+    assert isclose(x_grad.item(), x_tp.grad, abs_tol=abs_tol)
+    assert isclose(y_grad.item(), y_tp.grad, abs_tol=abs_tol)
+
+
+def test_tape_repeated_backward():
+    """Tests that repeated backward passes on a tape yield identical gradients.
+    """
+    tape = Tape()
+    a = TapeValue(data=2.0, tape=tape)
+    b = TapeValue(data=-3.0, tape=tape)
+
+    out = (a * b + a) * a
+    out.backward()
+    a_grad, b_grad = a.grad, b.grad
+    out.backward()
+
+    assert len(tape) == 5
+    assert a.grad == a_grad
+    assert b.grad == b_grad
+
+
+def test_tape_parallel_backward():
+    """Tests that wave-based backward pass yields the same gradients as the sequential pass.
+    """
+
+    def fun(a, b):
+        c = a * b
+        d = (c + a).tanh() * (c - b).relu()
+        e = d / (a * a + b * b)
+        return e ** 3 - c
+
+    tape = Tape()
+    a = TapeValue(data=0.5, tape=tape)
+    b = TapeValue(data=-1.5, tape=tape)
+    unused = a * b
+    out = fun(a, b)
+
+    out.backward()
+    grads = list(tape.grad)
+
+    out.backward(parallel=True)
+    assert unused.grad == 0.0
+    for grad_seq, grad_par in zip(grads, tape.grad):
+        assert isclose(grad_seq, grad_par, abs_tol=abs_tol)
+
+
+def test_tape_requires_grad():
+    """Tests that no gradients are computed on a tape for nodes that do not require them.
+    """
+    tape = Tape()
+    x = TapeValue(data=1.5, tape=tape, requires_grad=False)
+    w = TapeValue(data=-2.0, tape=tape)
+
+    h = x * x
+    out = (h * w).tanh() + h
+
+    for parallel in (False, True):
+        out.backward(parallel=parallel)
+
+        # Assert pruned nodes
+        assert not h.requires_grad
+        assert x.grad == 0.0
+        assert h.grad == 0.0
+
+        # Assert correct gradients
+        assert isclose((1.0 - tanh(1.5 * 1.5 * -2.0) ** 2) * 1.5 * 1.5, w.grad, abs_tol=abs_tol)
+
+
+def test_tape_compiled_backward():
+    """Tests that the specialized backward pass yields the same gradients as the generic pass.
+    """
+
+    def fun(a, b, c):
+        d = a * b - c / a
+        e = (d + b).tanh() * (c - a).relu()
+        return e ** 2 + (-d) ** 3
+
+    tape = Tape()
+    a = TapeValue(data=0.5, tape=tape)
+    b = TapeValue(data=-1.5, tape=tape)
+    c = TapeValue(data=2.0, tape=tape, requires_grad=False)
+    out = fun(a, b, c)
+
+    out.backward()
+    grads = list(tape.grad)
+
+    tape.compile_backward(out.index)(tape.grad, tape.data, tape.arg)
+    for grad_gen, grad_com in zip(grads, tape.grad):
+        assert isclose(grad_gen, grad_com, abs_tol=abs_tol)
+
+
+def test_trace():
+    """Tests that a traced function computes the same value and gradients as the scalar engine.
+    """
+
+    def fun(x, y):
+        z = y * x + y + x
+        q = z.relu() + z * x
+        h = (z * z).relu()
+        return (h + q + q * x) / y
+
+    value_and_grad = trace(fun, 1.0, 1.0)
+
+    for _x, _y in [(-4.0, 2.0), (3.0, -0.5)]:
+        out_tr, (x_tr, y_tr) = value_and_grad(_x, _y)
+
+        # PyGrad
+        x_pg = Value(_x)
+        y_pg = Value(_y)
+        out_pg = fun(x_pg, y_pg)
+        out_pg.backward()
+
+        # Assert correct forward pass
+        assert isclose(out_tr, out_pg.data, abs_tol=abs_tol)
+
+        # Assert correct gradients
+        assert isclose(x_tr, x_pg.grad, abs_tol=abs_tol)
+        assert isclose(y_tr, y_pg.grad, abs_tol=abs_tol)
+
+
+def test_tape_record():
+    """Tests that a graph of the scalar engine recorded on a tape yields the same gradients.
+    """
+    a = Value(data=0.5)
+    b = Value(data=-1.5)
+    c = Value(data=2.0, requires_grad=False)
+
+    d = a * b - c / a
+    e = (d + b).tanh() * (c * c - a).relu()
+    out = e ** 2 + a.pow_val(c * a + c) + (-d) ** 3
+    out.backward()
+
+    tape = Tape()
+    root = tape.record(out)
+    idx_a = tape.data.index(a.data)
+    idx_b = tape.data.index(b.data)
+    assert tape.data[root] == out.data
+
+    for parallel in [False, True]:
+        tape.backward(root, parallel=parallel)
+        assert isclose(tape.grad[idx_a], a.grad, abs_tol=abs_tol)
+        assert isclose(tape.grad[idx_b], b.grad, abs_tol=abs_tol)
+
+    tape.compile_backward(root)(tape.grad, tape.data, tape.arg)
+    assert isclose(tape.grad[idx_a], a.grad, abs_tol=abs_tol)
+    assert isclose(tape.grad[idx_b], b.grad, abs_tol=abs_tol)
+
+
+def test_jit():
+    """Tests that a replayed function computes the same value and gradients as the scalar engine.
+    """
+
+    def fun(x, y):
+        z = y * x + y + x
+        q = z.relu() + z * x
+        h = (z * z).relu() ** 3
+        return (h + q + q * x) / y - (x ** -2).tanh()
+
+    value_and_grad = jit(fun, 1.0, 1.0)
+
+    for _x, _y in [(-4.0, 2.0), (3.0, -0.5)]:
+        out_jit, (x_jit, y_jit) = value_and_grad(_x, _y)
+
+        # PyGrad
+        x_pg = Value(_x)
+        y_pg = Value(_y)
+        out_pg = fun(x_pg, y_pg)
+        out_pg.backward()
+
+        # Assert correct forward pass
+        assert isclose(out_jit, out_pg.data, abs_tol=abs_tol)
+
+        # Assert correct gradients
+        assert isclose(x_jit, x_pg.grad, abs_tol=abs_tol)
+        assert isclose(y_jit, y_pg.grad, abs_tol=abs_tol)
+
+
+def test_tape_float32():
+    """Tests that a single precision tape yields the gradients of a double precision tape.
+    """
+
+    def fun(a, b):
+        d = a * b - b / a
+        e = (d + b).tanh() * (b - a).relu()
+        return e ** 2 + (-d) ** 3
+
+    grads = {}
+    for typecode in ["d", "f"]:
+        tape = Tape(typecode=typecode)
+        a = TapeValue(data=0.5, tape=tape)
+        b = TapeValue(data=-1.5, tape=tape)
+        out = fun(a, b)
+        assert tape.grad.typecode == typecode
+
+        for parallel in [False, True]:
+            out.backward(parallel=parallel)
+            grads[typecode, parallel] = (a.grad, b.grad)
+
+        tape.compile_backward(out.index)(tape.grad, tape.data, tape.arg)
+        grads[typecode, "compiled"] = (a.grad, b.grad)
+
+    for mode in [False, True, "compiled"]:
+        for grad_d, grad_f in zip(grads["d", mode], grads["f", mode]):
+            assert isclose(grad_d, grad_f, abs_tol=1e-4)
+
+
+def test_trace_large_graph():
+    """Tests that a graph with thousands of nodes can be traced and computes correct gradients.
+    """
+
+    def fun(x, y):
+        out = x
+        for _ in range(500):
+            out = (out * y).tanh() + x
+        return out
+
+    value_and_grad = trace(fun, 0.3, 0.7)
+    out_tr, (x_tr, y_tr) = value_and_grad(0.5, -0.9)
+
+    # PyGrad
+    x_pg = Value(0.5)
+    y_pg = Value(-0.9)
+    out_pg = fun(x_pg, y_pg)
+    out_pg.backward()
+
+    # Assert correct forward pass
+    assert isclose(out_tr, out_pg.data, abs_tol=abs_tol)
+
+    # Assert correct gradients
+    assert isclose(x_tr, x_pg.grad, abs_tol=abs_tol)
+    assert isclose(y_tr, y_pg.grad, abs_tol=abs_tol)
+
+
+def test_tape_parallel_backward_after_forward():
+    """Tests that the parallel backward pass uses data recomputed by the forward pass.
+    """
+    tape = Tape()
+    x = TapeValue(data=0.5, tape=tape)
+    y = TapeValue(data=-1.5, tape=tape)
+    out = (x * y).tanh() * x + y / (x * x)
+    out.backward(parallel=True)
+
+    tape.data[x.index] = 2.0
+    tape.data[y.index] = 0.25
+    tape.forward(out.index)
+
+    out.backward()
+    grads = (x.grad, y.grad)
+    out.backward(parallel=True)
+
+    assert isclose(grads[0], x.grad, abs_tol=abs_tol)
+    assert isclose(grads[1], y.grad, abs_tol=abs_tol)
+
+
+def test_tape_record_forward():
+    """Tests that a recorded graph of the scalar engine is replayed correctly for new inputs.
+    """
+
+    def fun(x, y):
+        z = (x ** 3) * y + 2.0 * x
+        return (1.0 - z / 4.0).tanh() + 3.0 / (y - 0.5) + x.pow_val(y * y)
+
+    x = Value(data=1.0)
+    y = Value(data=2.0)
+    tape = Tape()
+    index = {}
+    root = tape.record(fun(x, y), index)
+    idx_x, idx_y = index[x], index[y]
+
+    tape.data[idx_x] = 1.5
+    tape.data[idx_y] = 0.25
+    tape.forward(root)
+    tape.backward(root)
+
+    # PyGrad
+    x = Value(data=1.5)
+    y = Value(data=0.25)
+    out = fun(x, y)
+    out.backward()
+
+    # Assert correct forward pass
+    assert isclose(tape.data[root], out.data, abs_tol=abs_tol)
+
+    # Assert correct gradients
+    assert isclose(tape.grad[idx_x], x.grad, abs_tol=abs_tol)
+    assert isclose(tape.grad[idx_y], y.grad, abs_tol=abs_tol)
+
+
+def test_tape_unrelated_overflow():
+    """Tests that nodes recorded before the root but outside of its graph do not affect gradients.
+    """
+    tape = Tape()
+    a = TapeValue(data=1e200, tape=tape)
+    c = TapeValue(data=2.0, tape=tape)
+
+    # Unrelated node with an infinite local gradient with respect to c
+    _ = (a * a) * c
+    out = c * c
+
+    # Assert correct gradients for all backward passes
+    out.backward()
+    assert c.grad == 4.0
+
+    out.backward(parallel=True)
+    assert c.grad == 4.0
+
+    tape.compile_backward(out.index)(tape.grad, tape.data, tape.arg)
+    assert c.grad == 4.0
+
+
+def test_tape_constants():
+    """Tests that constant operands are supported by traced and replayed functions.
+    """
+
+    def fun(x, y):
+        z = 2.0 * x + 1.0
+        z = z * y - 3.0 + x / 4.0
+        z = (1.0 - z).tanh() + 2.0 / y
+        return 0.0 + 1.0 * z
+
+    for transform in (trace, jit):
+        value_and_grad = transform(fun, 1.0, 1.0)
+
+        for _x, _y in [(-4.0, 2.0), (3.0, -0.5)]:
+            out_tp, (x_tp, y_tp) = value_and_grad(_x, _y)
+
+            # PyGrad
+            x_pg = Value(_x)
+            y_pg = Value(_y)
+            out_pg = fun(x_pg, y_pg)
+            out_pg.backward()
+
+            # Assert correct forward pass
+            assert isclose(out_tp, out_pg.data, abs_tol=abs_tol)
+
+            # Assert correct gradients
+            assert isclose(x_tp, x_pg.grad, abs_tol=abs_tol)
+            assert isclose(y_tp, y_pg.grad, abs_tol=abs_tol)
+
+    # Assert constants are not recorded
+    tape = Tape()
+    a = TapeValue(data=2.0, tape=tape)
+    out = (a + 1.0) * 3.0
+    assert len(tape) == 3
+    assert a + 0.0 is a
+
+    out.backward()
+    assert a.grad == 3.0
+
+
+def test_jit_pow():
+    """Tests that replayed powers agree with the scalar engine, also at a zero base.
+    """
+
+    def fun(x):
+        return x ** 0 + x + x ** 2 + x ** 3.0 + x ** 8 + (x * x + 1.0) ** -0.5
+
+    value_and_grad = jit(fun, 1.0)
+
+    for _x in (0.0, -1.5, 2.0):
+        out_jit, (x_jit,) = value_and_grad(_x)
+
+        # PyGrad
+        x_pg = Value(_x)
+        out_pg = fun(x_pg)
+        out_pg.backward()
+
+        # Assert correct forward pass
+        assert isclose(out_jit, out_pg.data, abs_tol=abs_tol)
+
+        # Assert correct gradients
+        assert isclose(x_jit, x_pg.grad, abs_tol=abs_tol)
+
+
+def test_tape_op_coverage():
+    """Tests that replay and generated backward passes cover every operation of the engine.
+    """
+    funs = [
+        lambda x, y: x + y,
+        lambda x, y: x - y,
+        lambda x, y: x * y,
+        lambda x, y: x / y,
+        lambda x, y: x ** 3,
+        lambda x, y: -x,
+        lambda x, y: x.tanh(),
+        lambda x, y: x.relu(),
+        lambda x, y: x.pow_val(y),
+        lambda x, y: (x + y).tanh(),
+        lambda x, y: 2.0 * x + 1.0,
+    ]
+    ops = set(range(1, len(_LOCAL_GRADS)))
+
+    # Assert every operation has a generated backward pass
+    assert set(_BACKWARD_SOURCE) == ops
+
+    recorded = set()
+    for fun in funs:
+        x = Value(0.75)
+        y = Value(1.5)
+        out = fun(x, y)
+        out.backward()
+        recorded.add(out._op)
+
+        tape = Tape()
+        index = {}
+        root = tape.record(out, index)
+
+        # Assert correct forward pass
+        tape.data[root] = float("nan")
+        tape.forward(root)
+        assert isclose(tape.data[root], out.data, abs_tol=abs_tol)
+
+        # Assert correct gradients
+        tape.compile_backward(root)(tape.grad, tape.data, tape.arg)
+        for leaf in (x, y):
+            if leaf in index:
+                assert isclose(tape.grad[index[leaf]], leaf.grad, abs_tol=abs_tol)
+
+    # Assert every operation was tested
+    assert recorded == ops
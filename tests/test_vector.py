@@ -0,0 +1,189 @@
+from math import isclose
+
+import numpy as np
+import torch
+
+from pygrad.engine import Value
+from pygrad.vector import PARALLEL_MIN_NODES, VectorValue
+
+abs_tol = 1e-5
+
+
+def test_vector_autograd_1():
+
+    def fun(a, b, u, v, w, x):
+        c = a + b
+        d = a * b + b ** 3
+        c = c + c + u
+        c = c + u + c + (-a)
+        d = d + d * v + (b + a).relu()
+        d = d + w * d + (b - a).relu()
+        e = c - d
+        f = e ** 2
+        g = f / v
+        g = g + x / f
+        return g.tanh()
+
+    inputs = np.array([
+        [-3.0, 2.0, 1.0, 2.0, 3.0, 10.0],
+        [0.5, -1.0, 2.0, -0.5, 1.0, 0.1],
+        [1.0, 1.5, -2.0, 4.0, -1.0, 3.0],
+    ])
+
+    # Vector
+    leaves_vc = [VectorValue(data=x) for x in inputs.T]
+    out_vc = fun(*leaves_vc)
+    out_vc.backward()
+
+    for i, row in enumerate(inputs):
+
+        # PyGrad
+        leaves_pg = [Value(data=x) for x in row]
+        out_pg = fun(*leaves_pg)
+        out_pg.backward()
+
+        # Assert correct forward pass
+        assert isclose(out_vc.data[i], out_pg.data, abs_tol=abs_tol)
+
+        # Assert correct gradients
+        for leaf_vc, leaf_pg in zip(leaves_vc, leaves_pg):
+            assert isclose(leaf_vc.grad[i], leaf_pg.grad, abs_tol=abs_tol)
+
+
+def test_vector_requires_grad():
+    """Tests that no gradients are computed for vector nodes that do not require them.
+    """
+    x_ = np.array([1.5, -0.5])
+    w_ = np.array([-2.0, 3.0])
+
+    x = VectorValue(data=x_, requires_grad=False)
+    w = VectorValue(data=w_)
+
+    out = (x * w).tanh()
+    out.backward()
+
+    # Assert correct gradients
+    assert np.all(x.grad == 0.0)
+    assert np.allclose((1.0 - np.tanh(x_ * w_) ** 2) * x_, w.grad)
+
+
+def test_vector_autograd_batched():
+    """Tests a batch of inputs combined with shared scalar parameters via broadcasting.
+    """
+
+    def fun(x, y):
+        z = y * x + y + x
+        q = z.relu() + z * x
+        h = (z * z).relu()
+        y = h + q + q * x
+        return y
+
+    _x = np.array([-4.0, -1.0, 0.5, 2.0])
+    _y = np.array(2.0)
+
+    # Vector
+    x_ = VectorValue(_x)
+    y_ = VectorValue(_y)
+
+    out = fun(x_, y_)
+    out.backward()
+
+    out_vc, x_vc, y_vc = out, x_, y_
+
+    # PyTorch
+    x_ = torch.tensor(_x).double()
+    y_ = torch.tensor(_y).double()
+    x_.requires_grad = True
+    y_.requires_grad = True
+
+    out = fun(x_, y_)
+    out.sum().backward()
+
+    out_pt, x_pt, y_pt = out, x_, y_
+
+    # Assert correct forward pass
+    assert np.allclose(out_pt.data.numpy(), out_vc.data)
+
+    # Assert correct gradients
+    assert y_vc.grad.shape == ()
+    assert np.allclose(x_pt.grad.data.numpy(), x_vc.grad)
+    assert np.allclose(y_pt.grad.data.numpy(), y_vc.grad)
+
+
+def test_vector_float32():
+    """Tests that single precision nodes keep their type and match double precision gradients.
+    """
+
+    def fun(x, y):
+        z = (x * y + x).tanh() / y
+        return (z - x) ** 2 + (-z).relu()
+
+    _x = np.array([0.5, -1.0, 2.0])
+    _y = np.array([1.5, 0.25, -3.0])
+
+    grads = {}
+    for dtype in [np.float64, np.float32]:
+        x = VectorValue(_x, dtype=dtype)
+        y = VectorValue(_y, dtype=dtype)
+        out = fun(x, y)
+        out.backward()
+
+        # Assert type is kept
+        assert out.data.dtype == dtype
+        assert x.grad.dtype == dtype
+
+        grads[dtype] = (x.grad, y.grad)
+
+    for grad_64, grad_32 in zip(grads[np.float64], grads[np.float32]):
+        assert np.allclose(grad_64, grad_32, atol=1e-4)
+
+
+def test_vector_parallel_backward():
+    """Tests that processing independent nodes on worker threads yields the sequential gradients.
+    """
+    rng = np.random.default_rng(seed=0)
+    _x = rng.normal(size=(8, 256))
+    _w = rng.normal(size=(16, 256))
+
+    grads = []
+    for parallel in [False, True]:
+        x = VectorValue(_x)
+        ws = [VectorValue(w) for w in _w]
+
+        # Independent branches sharing the input.
+        out = x
+        for w in ws:
+            out = out + ((x * w).tanh() - w / (x * x + w * w)).relu()
+        out.backward(parallel=parallel)
+
+        grads.append([x.grad] + [w.grad for w in ws])
+
+    assert len(out._topo) >= PARALLEL_MIN_NODES
+    for grad_seq, grad_par in zip(*grads):
+        assert np.allclose(grad_seq, grad_par)
+
+
+def test_vector_zero_grad_tree():
+    """Tests that resetting gradients of a vector graph discards accumulated gradients.
+    """
+    a_ = np.array([2.0, -1.0])
+    b_ = np.array([-3.0, 0.5])
+
+    a = VectorValue(data=a_)
+    b = VectorValue(data=b_)
+
+    out = (a * b + a) * a
+    out.backward()
+    out.backward()
+    out.zero_grad_tree()
+
+    # Assert reset gradients
+    assert np.all(a.grad == 0.0)
+    assert np.all(b.grad == 0.0)
+    assert np.all(out.grad == 0.0)
+
+    out.backward()
+
+    # Assert correct gradients
+    assert np.allclose(2.0 * a_ * b_ + 2.0 * a_, a.grad)
+    assert np.allclose(a_ * a_, b.grad)